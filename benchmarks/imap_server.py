@@ -0,0 +1,216 @@
+"""
+Local IMAP stand-in serving a synthetic mailbox.
+
+Implements the read-only subset of IMAP4rev1 that imaplib clients (including
+the MindsDB email engine) use to list and download mail: LOGIN, SELECT,
+SEARCH (ALL/SINCE/BEFORE/ON), FETCH and their UID variants. Every login sees
+the same INBOX; UIDs equal sequence numbers.
+
+The MindsDB email engine connects with IMAP4_SSL on port 993, so for end to
+end runs start the server with a certificate (a self-signed one is fine, as
+imaplib doesn't verify it by default):
+
+    openssl req -x509 -newkey rsa:2048 -nodes -days 30 -subj "/CN=localhost" \\
+        -keyout /tmp/imap.key -out /tmp/imap.crt
+    python -m benchmarks.imap_server --mailbox /tmp/mbox-10k --port 993 \\
+        --certfile /tmp/imap.crt --keyfile /tmp/imap.key
+"""
+import argparse
+import re
+import socketserver
+import ssl
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks.synthetic_mailbox import SyntheticMailbox
+
+_TOKEN = re.compile(r'"[^"]*"|\([^)]*\)|\S+')
+
+
+def parse_sequence_set(spec: str, maximum: int) -> list[int]:
+    """
+    Expand an IMAP sequence set such as `1:4,7,10:*` into sequence numbers.
+    """
+    numbers = []
+    for part in spec.split(","):
+        if ":" in part:
+            lo, hi = part.split(":")
+            lo = maximum if lo == "*" else int(lo)
+            hi = maximum if hi == "*" else int(hi)
+            lo, hi = min(lo, hi), max(lo, hi)
+            numbers.extend(range(max(lo, 1), min(hi, maximum) + 1))
+        else:
+            n = maximum if part == "*" else int(part)
+            if 1 <= n <= maximum:
+                numbers.append(n)
+    return numbers
+
+
+def _imap_day(value: str) -> int:
+    return datetime.strptime(value.strip('"'), "%d-%b-%Y").toordinal()
+
+
+class IMAPHandler(socketserver.StreamRequestHandler):
+    mailbox: SyntheticMailbox
+
+    def send(self, line: str | bytes) -> None:
+        self.wfile.write((line if isinstance(line, bytes) else line.encode()) + b"\r\n")
+
+    def handle(self) -> None:
+        self.send("* OK grepmail synthetic IMAP stand-in ready")
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            parts = raw.decode(errors="replace").strip().split(" ", 2)
+            if len(parts) < 2:
+                continue
+            tag, command = parts[0], parts[1].upper()
+            args = parts[2] if len(parts) > 2 else ""
+            uid = command == "UID"
+            if uid:
+                command, _, args = args.partition(" ")
+                command = command.upper()
+
+            handler = getattr(self, f"cmd_{command.lower()}", None)
+            if handler is None:
+                self.send(f"{tag} BAD unsupported command {command}")
+                continue
+            if handler(tag, args, uid) is False:
+                return
+
+    def cmd_capability(self, tag: str, args: str, uid: bool) -> None:
+        self.send("* CAPABILITY IMAP4rev1 AUTH=PLAIN")
+        self.send(f"{tag} OK CAPABILITY completed")
+
+    def cmd_login(self, tag: str, args: str, uid: bool) -> None:
+        self.send(f"{tag} OK LOGIN completed")
+
+    def cmd_list(self, tag: str, args: str, uid: bool) -> None:
+        self.send('* LIST (\\HasNoChildren) "/" "INBOX"')
+        self.send(f"{tag} OK LIST completed")
+
+    def cmd_select(self, tag: str, args: str, uid: bool) -> None:
+        count = len(self.mailbox)
+        self.send("* FLAGS (\\Seen \\Answered \\Flagged \\Deleted \\Draft)")
+        self.send(f"* {count} EXISTS")
+        self.send("* 0 RECENT")
+        self.send("* OK [UIDVALIDITY 1] UIDs valid")
+        self.send(f"* OK [UIDNEXT {count + 1}] Predicted next UID")
+        self.send(f"{tag} OK [READ-WRITE] SELECT completed")
+
+    cmd_examine = cmd_select
+
+    def cmd_search(self, tag: str, args: str, uid: bool) -> None:
+        days = np.asarray(self.mailbox.days)
+        mask = np.ones(len(days), dtype=bool)
+        tokens = _TOKEN.findall(args)
+        i = 0
+        while i < len(tokens):
+            key = tokens[i].upper()
+            if key == "CHARSET":
+                i += 1
+            elif key in ("SINCE", "BEFORE", "ON") and i + 1 < len(tokens):
+                day = _imap_day(tokens[i + 1])
+                mask &= {"SINCE": days >= day, "BEFORE": days < day, "ON": days == day}[key]
+                i += 1
+            elif key == "UID" and i + 1 < len(tokens):
+                selected = np.zeros(len(days), dtype=bool)
+                selected[np.asarray(parse_sequence_set(tokens[i + 1], len(days)), dtype=np.int64) - 1] = True
+                mask &= selected
+                i += 1
+            # ALL and every other criterion match everything
+            i += 1
+        found = " ".join(str(n) for n in np.flatnonzero(mask) + 1)
+        self.send(f"* SEARCH {found}".rstrip())
+        self.send(f"{tag} OK SEARCH completed")
+
+    def cmd_fetch(self, tag: str, args: str, uid: bool) -> None:
+        spec, _, items = args.partition(" ")
+        items = set(items.upper().strip("()").split())
+        for seq in parse_sequence_set(spec, len(self.mailbox)):
+            message = self.mailbox.get(seq)
+            fields = []
+            if uid or "UID" in items:
+                fields.append(f"UID {seq}")
+            if "FLAGS" in items:
+                fields.append("FLAGS (\\Seen)")
+            if "RFC822.SIZE" in items:
+                fields.append(f"RFC822.SIZE {len(message)}")
+            literal = None
+            if any("HEADER" in item for item in items):
+                header = message.split(b"\r\n\r\n", 1)[0] if b"\r\n\r\n" in message else message.split(b"\n\n", 1)[0]
+                name, literal = ("RFC822.HEADER" if "RFC822.HEADER" in items else "BODY[HEADER]"), header + b"\r\n\r\n"
+            elif items & {"RFC822", "BODY[]", "BODY.PEEK[]"}:
+                name, literal = ("RFC822" if "RFC822" in items else "BODY[]"), message
+
+            prefix = f"* {seq} FETCH ({' '.join(fields)}"
+            if literal is None:
+                self.send(prefix + ")")
+            else:
+                self.wfile.write(f"{prefix}{' ' if fields else ''}{name} {{{len(literal)}}}\r\n".encode())
+                self.wfile.write(literal)
+                self.send(")")
+        self.send(f"{tag} OK FETCH completed")
+
+    def cmd_store(self, tag: str, args: str, uid: bool) -> None:
+        self.send(f"{tag} OK STORE ignored")
+
+    def cmd_noop(self, tag: str, args: str, uid: bool) -> None:
+        self.send(f"{tag} OK NOOP completed")
+
+    def cmd_close(self, tag: str, args: str, uid: bool) -> None:
+        self.send(f"{tag} OK CLOSE completed")
+
+    def cmd_logout(self, tag: str, args: str, uid: bool) -> bool:
+        self.send("* BYE logging out")
+        self.send(f"{tag} OK LOGOUT completed")
+        return False
+
+
+class IMAPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address, mailbox: SyntheticMailbox, ssl_context: ssl.SSLContext | None = None):
+        handler = type("BoundIMAPHandler", (IMAPHandler,), {"mailbox": mailbox})
+        super().__init__(address, handler)
+        self.ssl_context = ssl_context
+
+    def get_request(self):
+        sock, addr = super().get_request()
+        if self.ssl_context is not None:
+            sock = self.ssl_context.wrap_socket(sock, server_side=True)
+        return sock, addr
+
+
+def serve_in_background(mailbox_path: str, host: str = "127.0.0.1", port: int = 0, certfile: str | None = None, keyfile: str | None = None) -> IMAPServer:
+    """
+    Start an IMAP stand-in for a mailbox on a daemon thread.
+
+    Returns:
+        IMAPServer: The running server; `server.server_address` holds the bound port.
+    """
+    context = None
+    if certfile:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(certfile, keyfile)
+    server = IMAPServer((host, port), SyntheticMailbox(mailbox_path), context)
+    threading.Thread(target=server.serve_forever, name="imap-stand-in", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a synthetic mailbox over IMAP.")
+    parser.add_argument("--mailbox", required=True)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1143)
+    parser.add_argument("--certfile")
+    parser.add_argument("--keyfile")
+    args = parser.parse_args()
+
+    server = serve_in_background(args.mailbox, args.host, args.port, args.certfile, args.keyfile)
+    print(f"Serving {len(server.RequestHandlerClass.mailbox)} messages on {args.host}:{server.server_address[1]}")
+    threading.Event().wait()
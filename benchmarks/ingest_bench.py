@@ -0,0 +1,168 @@
+"""
+End to end ingest benchmark against synthetic mailboxes.
+
+For every size tier a synthetic mailbox is generated (or reused), served by
+the local IMAP stand-in and ingested the way `grepmail run` does it:
+`bulk_insert` followed by database and knowledge base syncs until caught up.
+Reports messages/sec, embedding calls (knowledge base chunks written) and
+storage growth per tier.
+
+This writes to the Postgres database configured in `.env`; point
+POSTGRES_DB at a throwaway database before running it. Every tier runs in
+its own process with its own Postgres schema (`bench_<tier>`) and grepmail
+data dir under `--workdir`. The tier's emails table is created like the
+one in the configured POSTGRES_SCHEMA and emptied, and the pgvector
+`storage_table` and the knowledge base are dropped before the tier starts, so
+tiers and repeated runs don't see each other's data. `--imap-only` skips MindsDB
+entirely and measures raw IMAP download throughput.
+
+Usage:
+    python -m benchmarks.ingest_bench --tiers 10000,100000 --workdir /tmp/grepmail-bench \\
+        --port 993 --certfile /tmp/imap.crt --keyfile /tmp/imap.key
+"""
+import argparse
+import imaplib
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.imap_server import serve_in_background
+from benchmarks.synthetic_mailbox import SIZE_TIERS, write_mailbox
+
+
+def bench_imap(host: str, port: int, use_ssl: bool, batch_size: int = 500) -> dict:
+    """
+    Download the whole INBOX over IMAP and measure throughput.
+    """
+    client = imaplib.IMAP4_SSL(host, port) if use_ssl else imaplib.IMAP4(host, port)
+    client.login("bench", "bench")
+    _, data = client.select("INBOX")
+    count = int(data[0])
+
+    start = time.perf_counter()
+    downloaded = 0
+    for lo in range(1, count + 1, batch_size):
+        hi = min(count, lo + batch_size - 1)
+        _, parts = client.fetch(f"{lo}:{hi}", "(RFC822)")
+        downloaded += sum(len(part[1]) for part in parts if isinstance(part, tuple))
+    elapsed = time.perf_counter() - start
+    client.logout()
+    return {"messages": count, "seconds": elapsed, "msgs_per_sec": count / elapsed, "bytes": downloaded}
+
+
+def _native_scalar(database, sql: str) -> int:
+    df = database.query(f"SELECT * FROM {database.name} ({sql});").fetch()
+    return int(df.iloc[0, 0]) if not df.empty else 0
+
+
+def _native(database, sql: str) -> None:
+    database.query(f"SELECT * FROM {database.name} ({sql});").fetch()
+
+
+def bench_ingest(account: str, host: str, base_schema: str) -> dict:
+    """
+    Run bulk insert and syncs for `account` until the database stops growing.
+    Expects a fresh process, as the handlers read IMAP_SERVER, POSTGRES_SCHEMA
+    and GREPMAIL_DATA_DIR at import time.
+    """
+    import mindsdb_sdk
+
+    from grepmail.mindsdb.handlers.common import create_and_get_project
+    from grepmail.mindsdb.handlers.email import (
+        POSTGRES_SCHEMA,
+        bulk_insert,
+        create_and_get_email_db,
+        create_and_get_email_engine,
+        create_and_get_email_kb,
+        create_and_get_storage,
+        get_email_kb_name,
+        ingest_emails_to_kb,
+    )
+    from grepmail.threads import ThreadIndex, get_thread_index_path
+
+    server = mindsdb_sdk.connect(os.getenv("MINDSDB_URL", "http://127.0.0.1:47334"))
+    project = create_and_get_project(server, "grepmail_bench")
+    engine = create_and_get_email_engine(server, account, "bench")
+    db = create_and_get_email_db(server, account)
+    vs = create_and_get_storage(server, account)
+
+    # start from empty tables; all tiers share one pgvector storage_table
+    _native(db, f"CREATE SCHEMA IF NOT EXISTS {POSTGRES_SCHEMA}")
+    _native(db, f"CREATE TABLE IF NOT EXISTS {POSTGRES_SCHEMA}.emails (LIKE {base_schema}.emails INCLUDING ALL)")
+    _native(db, f"TRUNCATE {POSTGRES_SCHEMA}.emails")
+    project.query(f"DROP KNOWLEDGE_BASE IF EXISTS {get_email_kb_name(account)};").fetch()
+    _native(vs, "DROP TABLE IF EXISTS storage_table")
+    kb = create_and_get_email_kb(project, account)
+    thread_index = ThreadIndex(get_thread_index_path(account), owner=account)
+
+    def storage_bytes() -> int:
+        return _native_scalar(db, "SELECT pg_database_size(current_database())")
+
+    def emails() -> int:
+        return _native_scalar(db, f"SELECT count(*) FROM {POSTGRES_SCHEMA}.emails")
+
+    storage_before = storage_bytes()
+    start = time.perf_counter()
+
+    bulk_insert(project, kb, db, engine, thread_index)
+    while True:
+        before = emails()
+        project.query(f"""INSERT INTO {db.name}.emails
+SELECT *
+FROM {engine.name}.emails
+WHERE id > (
+    SELECT id FROM {db.name}.emails ORDER BY id DESC LIMIT 1
+);""").fetch()
+        ingest_emails_to_kb(kb, db, thread_index)
+        if emails() == before:
+            break
+
+    elapsed = time.perf_counter() - start
+    count = emails()
+    return {
+        "messages": count,
+        "seconds": elapsed,
+        "msgs_per_sec": count / elapsed if elapsed else 0.0,
+        "embedding_calls": _native_scalar(vs, "SELECT count(*) FROM storage_table"),
+        "storage_growth_bytes": storage_bytes() - storage_before,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark grepmail ingestion on synthetic mailboxes.")
+    parser.add_argument("--tiers", default=",".join(str(t) for t in SIZE_TIERS[:2]))
+    parser.add_argument("--workdir", default="/tmp/grepmail-bench")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--certfile")
+    parser.add_argument("--keyfile")
+    parser.add_argument("--imap-only", action="store_true")
+    args = parser.parse_args()
+    base_schema = os.getenv("POSTGRES_SCHEMA", "data")
+
+    for tier in (int(t) for t in args.tiers.split(",")):
+        path = os.path.join(args.workdir, f"mbox-{tier}")
+        if not os.path.exists(os.path.join(path, "meta.json")):
+            start = time.perf_counter()
+            meta = write_mailbox(path, tier)
+            print(f"[{tier}] generated {meta['bytes'] / 1e6:.1f} MB in {time.perf_counter() - start:.1f}s")
+
+        server = serve_in_background(path, args.host, args.port, args.certfile, args.keyfile)
+        port = server.server_address[1]
+        try:
+            if args.imap_only:
+                result = bench_imap(args.host, port, args.certfile is not None)
+            else:
+                state_dir = os.path.join(path, "state")
+                shutil.rmtree(state_dir, ignore_errors=True)
+                os.environ.update(IMAP_SERVER=args.host, POSTGRES_SCHEMA=f"bench_{tier}", GREPMAIL_DATA_DIR=state_dir)
+                # a fresh process per tier, so the settings above apply to the handlers
+                with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                    result = pool.submit(bench_ingest, f"bench{tier}@synthetic.example", args.host, base_schema).result()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        print(f"[{tier}] " + ", ".join(f"{k}={v:.1f}" if isinstance(v, float) else f"{k}={v}" for k, v in result.items()))
@@ -0,0 +1,184 @@
+"""
+Synthetic mailbox generator for ingest scale tests.
+
+Generates a deterministic mailbox of realistic-looking messages: plain
+personal mail, reply threads quoting their history, HTML newsletters and
+messages with attachments. Messages are stored as one concatenated file of
+RFC 822 blobs plus an offsets array, so the IMAP stand-in can serve any
+message by sequence number without loading the mailbox into memory.
+
+Usage:
+    python -m benchmarks.synthetic_mailbox --messages 10000 --out /tmp/mbox-10k
+"""
+import argparse
+import json
+import os
+import random
+from datetime import datetime, timedelta
+from email import policy
+from email.message import EmailMessage
+from email.utils import format_datetime
+
+import numpy as np
+
+SIZE_TIERS = (10_000, 100_000, 1_000_000)
+
+_WORDS = (
+    "contract review meeting schedule invoice payment project update release deploy "
+    "budget forecast quarter team offsite travel booking hotel flight agenda notes "
+    "design proposal feedback deadline client report metrics launch roadmap hiring "
+    "interview candidate onboarding security incident outage database migration "
+    "weekend dinner birthday photos family holiday plan question thanks please"
+).split()
+_PEOPLE = [f"{first}.{last}" for first in ("alice", "bob", "carol", "dave", "erin", "frank", "grace", "heidi")
+           for last in ("smith", "jones", "lee", "garcia", "chen", "patel")]
+_DOMAINS = ("example.com", "corp.example", "mail.example.org", "partner.example.net")
+_NEWSLETTERS = ("news@daily.example", "digest@weekly.example", "offers@shop.example", "updates@saas.example")
+_OWNER = "me@example.com"
+
+# share of each message kind, the remainder is plain one-off mail
+_THREAD_SHARE = 0.35
+_NEWSLETTER_SHARE = 0.25
+_ATTACHMENT_SHARE = 0.10
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _paragraphs(rng: random.Random, count: int) -> str:
+    return "\n\n".join(" ".join(_sentence(rng, rng.randint(6, 16)) for _ in range(rng.randint(2, 5))) for _ in range(count))
+
+
+def _address(rng: random.Random) -> str:
+    return f"{rng.choice(_PEOPLE)}@{rng.choice(_DOMAINS)}"
+
+
+def _quote(body: str, sender: str, sent: datetime) -> str:
+    quoted = "\n".join(f"> {line}" for line in body.splitlines())
+    return f"On {sent:%a, %b %d, %Y at %H:%M}, {sender} wrote:\n{quoted}"
+
+
+def generate_messages(count: int, seed: int = 0, start: datetime | None = None):
+    """
+    Yield `count` synthetic messages as (date, raw bytes) pairs, oldest first.
+
+    Args:
+        count (int): The number of messages.
+        seed (int): Seed for deterministic output.
+        start (datetime | None): Date of the first message, defaults to about two years ago.
+    """
+    rng = random.Random(seed)
+    sent = start or datetime.now().replace(microsecond=0) - timedelta(days=730)
+    step = timedelta(days=730) / max(count, 1)
+    open_threads = []
+
+    for i in range(count):
+        sent += step * rng.uniform(0.5, 1.5)
+        msg = EmailMessage()
+        msg["Date"] = format_datetime(sent)
+        msg["Message-ID"] = f"<{i}.{seed}@synthetic.example>"
+        roll = rng.random()
+
+        if roll < _THREAD_SHARE and open_threads and rng.random() < 0.7:
+            thread = rng.choice(open_threads)
+            sender = rng.choice([p for p in thread["participants"] if p != thread["last_sender"]] or [_OWNER])
+            msg["From"] = sender
+            msg["To"] = ", ".join(p for p in thread["participants"] if p != sender)
+            msg["Subject"] = f"Re: {thread['subject']}"
+            msg["In-Reply-To"] = thread["message_id"]
+            msg["References"] = " ".join(thread["references"])
+            body = _paragraphs(rng, rng.randint(1, 2)) + "\n\n" + _quote(thread["body"], thread["last_sender"], thread["sent"])
+            msg.set_content(body)
+            thread.update(message_id=msg["Message-ID"], last_sender=sender, body=body, sent=sent)
+            thread["references"].append(msg["Message-ID"])
+            if len(thread["references"]) > rng.randint(3, 12):
+                open_threads.remove(thread)
+
+        elif roll < _THREAD_SHARE:
+            sender = _address(rng)
+            participants = [sender, _OWNER] + [_address(rng) for _ in range(rng.randint(0, 2))]
+            subject = _sentence(rng, rng.randint(3, 7))[:-1]
+            body = _paragraphs(rng, rng.randint(1, 4))
+            msg["From"], msg["To"], msg["Subject"] = sender, ", ".join(participants[1:]), subject
+            msg.set_content(body)
+            open_threads.append({
+                "subject": subject, "participants": participants, "message_id": msg["Message-ID"],
+                "references": [msg["Message-ID"]], "last_sender": sender, "body": body, "sent": sent,
+            })
+            open_threads = open_threads[-200:]
+
+        elif roll < _THREAD_SHARE + _NEWSLETTER_SHARE:
+            sender = rng.choice(_NEWSLETTERS)
+            msg["From"], msg["To"] = sender, _OWNER
+            msg["Subject"] = f"{sender.split('@')[1].split('.')[0].title()} digest: {_sentence(rng, 4)[:-1]}"
+            text = _paragraphs(rng, rng.randint(3, 6))
+            msg.set_content(text)
+            items = "".join(f"<tr><td><h2>{_sentence(rng, 5)}</h2><p>{p}</p><a href='https://{sender.split('@')[1]}/a/{rng.randint(1, 10**9)}'>Read more</a></td></tr>"
+                            for p in text.split("\n\n"))
+            msg.add_alternative(f"<html><body><table width='600'>{items}</table><p style='font-size:10px'>Unsubscribe</p></body></html>", subtype="html")
+
+        else:
+            msg["From"], msg["To"] = _address(rng), _OWNER
+            msg["Subject"] = _sentence(rng, rng.randint(3, 8))[:-1]
+            msg.set_content(_paragraphs(rng, rng.randint(1, 3)))
+            if roll < _THREAD_SHARE + _NEWSLETTER_SHARE + _ATTACHMENT_SHARE:
+                payload = rng.randbytes(rng.randint(10_000, 200_000))
+                msg.add_attachment(payload, maintype="application", subtype="pdf", filename=f"{rng.choice(_WORDS)}.pdf")
+
+        yield sent, msg.as_bytes(policy=policy.SMTP)
+
+
+def write_mailbox(path: str, count: int, seed: int = 0) -> dict:
+    """
+    Generate a mailbox into `path` (messages.bin, offsets.npy, days.npy, meta.json).
+
+    Returns:
+        dict: The mailbox metadata (message count and total size in bytes).
+    """
+    os.makedirs(path, exist_ok=True)
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    days = np.zeros(count, dtype=np.int32)
+    with open(os.path.join(path, "messages.bin"), "wb") as f:
+        for i, (sent, raw) in enumerate(generate_messages(count, seed)):
+            f.write(raw)
+            offsets[i + 1] = offsets[i] + len(raw)
+            days[i] = sent.toordinal()
+    np.save(os.path.join(path, "offsets.npy"), offsets)
+    np.save(os.path.join(path, "days.npy"), days)
+    meta = {"count": count, "bytes": int(offsets[-1]), "seed": seed}
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump(meta, f)
+    return meta
+
+
+class SyntheticMailbox:
+    """
+    Read-only, memory-mapped view of a mailbox written by `write_mailbox`.
+
+    Args:
+        path (str): The mailbox directory.
+    """
+
+    def __init__(self, path: str):
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self.days = np.load(os.path.join(path, "days.npy"), mmap_mode="r")
+        self.data = np.memmap(os.path.join(path, "messages.bin"), dtype=np.uint8, mode="r")
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def get(self, seq: int) -> bytes:
+        """
+        Return message `seq` (1-based, as IMAP sequence numbers are).
+        """
+        return bytes(self.data[self.offsets[seq - 1]:self.offsets[seq]])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic mailbox.")
+    parser.add_argument("--messages", type=int, default=SIZE_TIERS[0])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+    print(write_mailbox(args.out, args.messages, args.seed))
@@ -0,0 +1,149 @@
+import json
+import os
+import threading
+import time
+from datetime import date, timedelta
+from typing import Callable
+
+from grepmail.logger import logger
+from grepmail.vector_index import GREPMAIL_DATA_DIR
+
+# The first run only ingests this many days of mail before handing over to the prompt.
+RECENT_DAYS = int(os.getenv("GREPMAIL_RECENT_DAYS", 30))
+BACKFILL_WINDOW_DAYS = int(os.getenv("GREPMAIL_BACKFILL_WINDOW_DAYS", 7))
+# The backfill stops after this many consecutive windows without mail.
+BACKFILL_MAX_EMPTY_WINDOWS = int(os.getenv("GREPMAIL_BACKFILL_MAX_EMPTY_WINDOWS", 104))
+# Pause between windows so the backfill never saturates the IMAP server or the embedder.
+BACKFILL_PAUSE_SECONDS = float(os.getenv("GREPMAIL_BACKFILL_PAUSE_SECONDS", 1.0))
+BACKFILL_RETRY_SECONDS = 60
+# The backfill stops after this many consecutive failures of the same window.
+BACKFILL_MAX_RETRIES = int(os.getenv("GREPMAIL_BACKFILL_MAX_RETRIES", 3))
+
+
+def get_recent_since(days: int = RECENT_DAYS) -> str:
+    """
+    Return the first day (yyyy-mm-dd) of the recent window ingested up front.
+    """
+    return (date.today() - timedelta(days=days)).isoformat()
+
+
+class BackfillWorker:
+    """
+    Walks the mailbox backwards in date windows, older than anything ingested
+    so far, in a background thread. The cursor is persisted after every window
+    so a restart resumes where the previous run stopped.
+
+    The worker yields to the interactive prompt: `pause()` blocks it before
+    the next window (and before the next batch, for steps that wait on
+    `idle`) until `resume()` is called. A window that keeps failing stops the
+    backfill with the error logged and kept in `error`; the next run retries it.
+
+    Args:
+        path (str): The JSON file the backfill state is persisted to.
+        step (Callable): Ingests the emails in [since, until) and returns how many it found.
+        oldest (Callable): Returns the datetime of the oldest ingested email, or None.
+        mailbox_size (Callable): Returns the number of emails in the mailbox, or None.
+    """
+
+    def __init__(self, path: str, step: Callable[[str, str], int], oldest: Callable[[], str | None], mailbox_size: Callable[[], int | None]):
+        self.path = path
+        self.step = step
+        self.oldest = oldest
+        self.mailbox_size = mailbox_size
+        self.total = None
+        self.error = None
+        self.idle = threading.Event()
+        self.idle.set()
+        self.state = {"cursor": None, "empty_windows": 0, "done": False, "backfilled": 0}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.state.update(json.load(f))
+        self._thread = threading.Thread(target=self._run, name="grepmail-backfill", daemon=True)
+
+    @property
+    def done(self) -> bool:
+        return self.state["done"]
+
+    def start(self) -> "BackfillWorker":
+        if not self._thread.is_alive() and self._thread.ident is None:
+            self._thread.start()
+        return self
+
+    def reset(self) -> None:
+        """
+        Start the backfill over from the oldest ingested email, e.g. when the knowledge base is rebuilt.
+        """
+        self.state = {"cursor": None, "empty_windows": 0, "done": False, "backfilled": 0}
+        self._save()
+
+    def pause(self) -> None:
+        self.idle.clear()
+
+    def resume(self) -> None:
+        self.idle.set()
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.state, f)
+        os.replace(tmp, self.path)
+
+    def _run(self) -> None:
+        self.total = self.mailbox_size()
+        failures = 0
+        while not self.state["done"]:
+            self.idle.wait()
+            try:
+                if self.state["cursor"] is None:
+                    oldest = self.oldest()
+                    self.state["cursor"] = str(oldest or get_recent_since())
+
+                until = self.state["cursor"]
+                since = (date.fromisoformat(until[:10]) - timedelta(days=BACKFILL_WINDOW_DAYS)).isoformat()
+                found = self.step(since, until)
+            except Exception as e:
+                failures += 1
+                if failures >= BACKFILL_MAX_RETRIES:
+                    self.error = f"window before {self.state['cursor']} failed {failures} times: {e}"
+                    logger.error(f"Backfill stopped, {self.error}")
+                    return
+                logger.error(f"Backfill window before {self.state['cursor']} failed, retrying: {e}")
+                time.sleep(BACKFILL_RETRY_SECONDS)
+                continue
+
+            failures = 0
+            self.state["cursor"] = since
+            self.state["backfilled"] += found
+            self.state["empty_windows"] = 0 if found else self.state["empty_windows"] + 1
+            if self.state["empty_windows"] >= BACKFILL_MAX_EMPTY_WINDOWS:
+                self.state["done"] = True
+                logger.info(f"Backfill finished after {self.state['backfilled']} emails, no mail before {until}.")
+            self._save()
+            time.sleep(BACKFILL_PAUSE_SECONDS)
+
+    def coverage(self, indexed: int) -> str:
+        """
+        Describe how much of the mailbox is indexed, e.g. for a search caption.
+        Returns an empty string once everything is indexed.
+
+        Args:
+            indexed (int): The number of emails stored in the knowledge base.
+        """
+        if self.done and (not self.total or indexed >= self.total):
+            return ""
+        suffix = f"backfilling mail before {self.state['cursor'][:10]}" if self.state["cursor"] else "backfill pending"
+        if self.done:
+            suffix = "backfill finished"
+        elif self.error:
+            suffix = "backfill stopped, see the log"
+        if not self.total:
+            return f"indexed {indexed} emails · {suffix}"
+        return f"indexed {min(indexed / self.total, 1.0):.0%} of mailbox ({indexed}/{self.total}) · {suffix}"
+
+
+def get_backfill_state_path(email: str) -> str:
+    """
+    Generate the backfill state file path based on the email address.
+    """
+    return os.path.join(GREPMAIL_DATA_DIR, f'backfill_{email.split("@")[0]}.json')
@@ -0,0 +1,284 @@
+import json
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import List
+
+import numpy as np
+
+from grepmail.logger import logger
+from grepmail.vector_index import GREPMAIL_DATA_DIR
+
+_EPOCH = datetime(1970, 1, 1)
+_INITIAL_CAPACITY = 4096
+_UNKNOWN_TS = np.iinfo(np.int64).min
+# 2: senders are the full From header rather than the bare address
+_FORMAT_VERSION = 2
+
+# name -> dtype of the fixed-width columns
+_COLUMNS = {
+    "ids": np.int64,
+    "ts": np.int64,
+    "sender": np.int32,
+    "subj_off": np.int64,
+    "subj_len": np.int32,
+}
+
+
+def to_timestamp(value) -> int:
+    """
+    Convert an email datetime to naive seconds since the epoch (`_UNKNOWN_TS` when unknown).
+    """
+    if not value:
+        return _UNKNOWN_TS
+    try:
+        dt = value if isinstance(value, datetime) else datetime.fromisoformat(str(value).split(".")[0])
+    except ValueError:
+        return _UNKNOWN_TS
+    return int((dt.replace(tzinfo=None) - _EPOCH).total_seconds())
+
+
+def from_timestamp(ts: int) -> str | None:
+    if ts == _UNKNOWN_TS:
+        return None
+    return str(_EPOCH + timedelta(seconds=int(ts)))
+
+
+def get_sender_address(from_field: str | None) -> str:
+    """
+    Extract the address shown for a sender, e.g. `alice@x.com` from `Alice <alice@x.com>`.
+    """
+    return (from_field or "Unknown").split(" ")[-1].strip("<>").lower()
+
+
+class HeaderStore:
+    """
+    Compact on-disk copy of the email headers (id, subject, sender, date).
+
+    Fixed-width columns are memory-mapped NumPy arrays, subjects live in a
+    single UTF-8 blob addressed by offset/length and senders (the full From
+    header) are interned, so millions of headers cost a few tens of bytes each and are
+    paged in by the OS only when touched. `/ls`, subject greps and sender/date
+    lookups run against it without a round trip to MindsDB.
+
+    Args:
+        path (str): Directory holding the store files.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        self.meta = {"count": 0, "capacity": 0, "watermark": 0, "blob_size": 0, "version": _FORMAT_VERSION}
+        if os.path.exists(self._file("meta.json")):
+            with open(self._file("meta.json")) as f:
+                stored = json.load(f)
+            if stored.get("version", 1) == _FORMAT_VERSION:
+                self.meta.update(stored)
+            else:
+                logger.info(f"Header store '{path}' has an older format, it is rebuilt from the database.")
+                for name in [f"{name}.col" for name in _COLUMNS] + ["subjects.bin", "senders.json", "meta.json"]:
+                    if os.path.exists(self._file(name)):
+                        os.remove(self._file(name))
+        self.senders: List[str] = []
+        if os.path.exists(self._file("senders.json")):
+            with open(self._file("senders.json")) as f:
+                self.senders = json.load(f)
+        self._sender_ids = {sender: i for i, sender in enumerate(self.senders)}
+        self.columns: dict[str, np.memmap] = {}
+        self.blob = None
+        self._order = None
+        if self.meta["capacity"]:
+            self._open()
+
+    @property
+    def count(self) -> int:
+        return self.meta["count"]
+
+    @property
+    def watermark(self) -> int:
+        return self.meta["watermark"]
+
+    def contains(self, ids: List[int]) -> set[int]:
+        """
+        Return the subset of `ids` already stored.
+        """
+        with self._lock:
+            n = self.count
+            if n == 0 or not ids:
+                return set()
+            ids = np.asarray(ids, dtype=np.int64)
+            return set(ids[np.isin(ids, self.columns["ids"][:n])].tolist())
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _open(self) -> None:
+        for name, dtype in _COLUMNS.items():
+            self.columns[name] = np.memmap(self._file(f"{name}.col"), dtype=dtype, mode="r+", shape=(self.meta["capacity"],))
+        self._open_blob()
+
+    def _open_blob(self) -> None:
+        size = self.meta["blob_size"]
+        self.blob = np.memmap(self._file("subjects.bin"), dtype=np.uint8, mode="r", shape=(size,)) if size else None
+
+    def _grow(self, needed: int) -> None:
+        capacity = max(self.meta["capacity"], _INITIAL_CAPACITY)
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self.meta["capacity"]:
+            return
+        for name, dtype in _COLUMNS.items():
+            with open(self._file(f"{name}.col"), "ab") as f:
+                f.truncate(capacity * np.dtype(dtype).itemsize)
+        self.meta["capacity"] = capacity
+        self.columns = {}
+        self._open()
+
+    def _save(self) -> None:
+        for name, payload in (("senders.json", self.senders), ("meta.json", self.meta)):
+            tmp = self._file(f"{name}.tmp")
+            with open(tmp, "w") as f:
+                json.dump(payload, f)
+            os.replace(tmp, self._file(name))
+
+    def _intern(self, sender: str) -> int:
+        if sender not in self._sender_ids:
+            self._sender_ids[sender] = len(self.senders)
+            self.senders.append(sender)
+        return self._sender_ids[sender]
+
+    def add(self, rows: List[dict]) -> None:
+        """
+        Append email headers (id, subject, from_field, datetime), in any order.
+        """
+        if not rows:
+            return
+        ids = [row["id"] for row in rows]
+        timestamps = [to_timestamp(row.get("datetime")) for row in rows]
+        senders = [row.get("from_field") or "" for row in rows]
+        encoded = [(row.get("subject") or "").encode("utf-8") for row in rows]
+        lengths = np.fromiter((len(e) for e in encoded), dtype=np.int32, count=len(encoded))
+        with self._lock:
+            start, end = self.count, self.count + len(rows)
+            self._grow(end)
+
+            offsets = self.meta["blob_size"] + np.concatenate(([0], np.cumsum(lengths[:-1], dtype=np.int64)))
+            # drop whatever an interrupted add left past the committed end of the blob
+            with open(self._file("subjects.bin"), "ab") as f:
+                f.truncate(self.meta["blob_size"])
+                f.write(b"".join(encoded))
+
+            cols = self.columns
+            cols["ids"][start:end] = ids
+            cols["ts"][start:end] = timestamps
+            cols["sender"][start:end] = [self._intern(sender) for sender in senders]
+            cols["subj_off"][start:end] = offsets
+            cols["subj_len"][start:end] = lengths
+            for col in cols.values():
+                col.flush()
+
+            self.meta["blob_size"] += int(lengths.sum())
+            self.meta["count"] = end
+            self.meta["watermark"] = max(self.meta["watermark"], int(max(ids)))
+            self._save()
+            self._open_blob()
+            self._order = None
+
+    def _subject(self, row: int) -> str:
+        off, length = int(self.columns["subj_off"][row]), int(self.columns["subj_len"][row])
+        return bytes(self.blob[off:off + length]).decode("utf-8", errors="replace") if length else ""
+
+    def _row(self, row: int) -> dict:
+        return {
+            "id": int(self.columns["ids"][row]),
+            "subject": self._subject(row),
+            "from_field": self.senders[self.columns["sender"][row]],
+            "datetime": from_timestamp(self.columns["ts"][row]),
+        }
+
+    def _sorted(self) -> np.ndarray:
+        """
+        Row numbers sorted ascending by (datetime, id), cached until the next append.
+        """
+        if self._order is None:
+            n = self.count
+            self._order = np.lexsort((self.columns["ids"][:n], self.columns["ts"][:n]))
+        return self._order
+
+    def _position(self, order: np.ndarray, cursor: tuple | None) -> int:
+        """
+        Number of rows in `order` that sort strictly before the (datetime, id) cursor.
+        """
+        if cursor is None:
+            return len(order)
+        ts, last_id = to_timestamp(cursor[0]), int(cursor[1])
+        keys_ts = self.columns["ts"][order]
+        left = int(np.searchsorted(keys_ts, ts, "left"))
+        right = int(np.searchsorted(keys_ts, ts, "right"))
+        return left + int(np.searchsorted(self.columns["ids"][order[left:right]], last_id, "left"))
+
+    def latest_page(self, cursor: tuple | None, limit: int, sender: str | None = None, day: str | None = None) -> tuple[List[dict], tuple | None]:
+        """
+        Page through headers newest first with the same (datetime, id) keyset
+        cursor as `fetch_latest_emails_page`, optionally filtered on sender and day.
+
+        Args:
+            cursor (tuple | None): The (datetime, id) of the last row of the previous page.
+            limit (int): The number of headers per page.
+            sender (str | None): Optional text the From header must contain, case-insensitively
+                (the same matching as `fetch_latest_emails_page`).
+            day (str | None): Optional day (yyyy-mm-dd) to match.
+
+        Returns:
+            tuple: The rows of the page and the cursor of the next page (None when exhausted).
+        """
+        with self._lock:
+            if not self.count:
+                return [], None
+            order = self._sorted()
+            order = order[:self._position(order, cursor)]
+            if day is not None:
+                start = to_timestamp(day)
+                keys_ts = self.columns["ts"][order]
+                order = order[np.searchsorted(keys_ts, start, "left"):np.searchsorted(keys_ts, start + 86400, "left")]
+            if sender is not None:
+                sender_ids = [i for i, from_field in enumerate(self.senders) if sender.lower() in from_field.lower()]
+                if not sender_ids:
+                    return [], None
+                order = order[np.isin(self.columns["sender"][order], sender_ids)]
+
+            page = order[::-1][:limit]
+            rows = [self._row(r) for r in page]
+            if len(order) <= limit:
+                return rows, None
+            return rows, (rows[-1]["datetime"], rows[-1]["id"])
+
+    def grep_page(self, pattern: str, cursor: tuple | None, limit: int) -> tuple[List[dict], tuple | None]:
+        """
+        Page through headers whose subject matches a regex, newest first.
+
+        Returns:
+            tuple: The matching rows and the cursor of the next page (None when exhausted).
+        """
+        regex = re.compile(pattern, re.IGNORECASE)
+        with self._lock:
+            if not self.count:
+                return [], None
+            order = self._sorted()
+            order = order[:self._position(order, cursor)]
+            matches = []
+            for r in order[::-1]:
+                if regex.search(self._subject(r)):
+                    matches.append(self._row(r))
+                    if len(matches) == limit:
+                        return matches, (matches[-1]["datetime"], matches[-1]["id"])
+            return matches, None
+
+
+def get_header_store_path(email: str) -> str:
+    """
+    Generate the header store directory based on the email address.
+    """
+    return os.path.join(GREPMAIL_DATA_DIR, f'headers_{email.split("@")[0]}')
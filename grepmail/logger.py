@@ -1,27 +1,75 @@
+import atexit
+import hashlib
 import logging
+import os
+import queue
+import random
 import sys
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
-# Configure a single, reusable logger
+from dotenv import load_dotenv
+
+# Settings are read at import time and this is the first grepmail module to be
+# imported, so `.env` is loaded here rather than by the entry points.
+load_dotenv()
+
+LOG_DIR = os.path.expanduser(
+    os.getenv("GREPMAIL_LOG_DIR", os.path.join(os.getenv("GREPMAIL_DATA_DIR", "~/.grepmail"), "logs"))
+)
+LOG_LEVEL = os.getenv("GREPMAIL_LOG_LEVEL", "INFO").upper()
+LOG_MAX_BYTES = int(os.getenv("GREPMAIL_LOG_MAX_BYTES", 5 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.getenv("GREPMAIL_LOG_BACKUP_COUNT", 3))
+
+# Fraction of queries logged with their full SQL; the rest are logged as a
+# digest, kind and size only, which keeps user text out of the log file.
+SQL_LOG_SAMPLE_RATE = float(os.getenv("GREPMAIL_SQL_LOG_SAMPLE_RATE", 0.01))
+
+# Configure a single, reusable logger. Records are handed to a queue and
+# written by a background listener, so logging never blocks on disk I/O.
 logger = logging.getLogger("grepmail")
 if not logger.hasHandlers():
-    logger.setLevel(logging.INFO)
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
 
-    # Console handler (only for errors and above)
-    stream_handler = logging.StreamHandler(sys.stdout)
-    stream_handler.setLevel(logging.ERROR)
-    stream_formatter = logging.Formatter(
+    formatter = logging.Formatter(
         '[%(asctime)s] %(levelname)s - %(name)s - %(message)s',
         datefmt='%Y-%m-%d %H:%M:%S'
     )
-    stream_handler.setFormatter(stream_formatter)
-    logger.addHandler(stream_handler)
 
-    # File handler (for all messages INFO and above)
-    file_handler = logging.FileHandler("grepmail.log")
-    file_handler.setLevel(logging.INFO)
-    file_formatter = logging.Formatter(
-        '[%(asctime)s] %(levelname)s - %(name)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
+    # Console handler (only for errors and above)
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setLevel(logging.ERROR)
+    stream_handler.setFormatter(formatter)
+
+    # Rotating file handler (for all messages at LOG_LEVEL and above)
+    os.makedirs(LOG_DIR, exist_ok=True)
+    file_handler = RotatingFileHandler(
+        os.path.join(LOG_DIR, "grepmail.log"), maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT
     )
-    file_handler.setFormatter(file_formatter)
-    logger.addHandler(file_handler)
+    file_handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, stream_handler, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+
+def log_query(target: str, query: str) -> None:
+    """
+    Log a SQL query against `target`.
+    Only a sampled fraction of queries is logged in full; the rest are logged
+    as a short digest with the statement kind and length.
+
+    Args:
+        target (str): The database or knowledge base the query runs on.
+        query (str): The SQL query.
+    """
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    digest = hashlib.sha1(query.encode()).hexdigest()[:10]
+    if random.random() < SQL_LOG_SAMPLE_RATE:
+        logger.info(f"Querying '{target}' [{digest}] with query: {query}")
+    else:
+        kind = query.split(None, 1)[0].upper() if query.strip() else ""
+        logger.info(f"Querying '{target}' [{digest}] {kind} ({len(query)} chars)")
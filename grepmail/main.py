@@ -1,9 +1,13 @@
 import os
+import re
+import threading
+import time
 
 import mindsdb_sdk
 import typer
 from dotenv import load_dotenv
 from rich.console import Console
+from rich.live import Live
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.prompt import Prompt
 from rich.panel import Panel
@@ -13,6 +17,7 @@ from grepmail.mindsdb.handlers.common import (
     create_and_get_project,
     create_gemini_engine,
     create_and_get_gist_model,
+    probe_gist_model,
     query_gist_model
 )
 from grepmail.mindsdb.handlers.email import (
@@ -21,12 +26,31 @@ from grepmail.mindsdb.handlers.email import (
     create_and_get_storage,
     create_and_get_email_kb,
     bulk_insert,
+    backfill_emails,
+    compact_email_kb,
+    get_oldest_email_datetime,
+    get_mailbox_size,
     query_email_db,
-    query_email_kb,
+    fetch_latest_emails_page,
+    grep_email_subjects_page,
+    semantic_page_fetcher,
+    hydrate_rows,
+    probe_email_kb,
+    sync_header_store,
+    sync_local_index,
+    ingest_emails_to_kb,
     create_kb_index,
     create_jobs,
 )
+from grepmail.backfill import BackfillWorker, get_backfill_state_path, get_recent_since
+from grepmail.header_store import HeaderStore, get_header_store_path
 from grepmail.logger import logger
+from grepmail.pager import Pager
+from grepmail.rerank import RERANK_POLICIES, format_timings, get_rerank_policy, split_rerank_flag
+from grepmail.retention import RetentionState, format_compaction, get_retention_state_path
+from grepmail.threads import ThreadIndex, get_thread_index_path
+from grepmail.vector_index import LOCAL_INDEX_MODE, LocalVectorIndex, embed_texts, get_local_index_path
+from grepmail.warmup import WARMUP_GIST, Warmup
 
 
 load_dotenv()
@@ -35,10 +59,150 @@ EMAIL_ID = os.getenv("EMAIL_ID")
 EMAIL_PWD = os.getenv("EMAIL_PWD")
 
 
+PAGE_SIZE = 10
+SYNC_INTERVAL = 60 * 60
+
 app = typer.Typer()
 console = Console()
 
 
+def build_email_table(title: str, rows: list[dict], with_snippet: bool = False, footer: str | None = None) -> Table:
+    """
+    Build a Rich table for a page of emails.
+    Rows that are still waiting for hydration show a placeholder for sender and snippet.
+    """
+    table = Table(title=title, show_lines=True, caption=footer)
+    table.add_column("ID", style="cyan")
+    table.add_column("Subject", style="bold cyan")
+    table.add_column("From", style="yellow")
+    table.add_column("Date", style="white")
+    if with_snippet:
+        table.add_column("Snippet", style="dim", overflow="fold")
+
+    for email in rows:
+        id = email.get("id")
+        hydrated = "body" in email or not with_snippet
+        subject = email.get("subject") or ("No Subject" if hydrated else "…")
+        if with_snippet:
+            subject = subject[:100] + "..."
+        if "from_field" in email:
+            from_ = (email.get("from_field") or "Unknown").split(" ")[-1].strip("<>")
+        else:
+            from_ = "…"
+        date = email.get("datetime")
+        if date:
+            date = str(date).split(" ")[0]
+        else:
+            date = "Unknown Date" if hydrated else "…"
+        cells = [str(id), subject, from_, date]
+        if with_snippet:
+            if hydrated:
+                cells.append((email.get("body") or "").strip().replace("\n", " ")[:100] + "...")
+            else:
+                cells.append("…")
+        table.add_row(*cells)
+
+    return table
+
+
+def render_email_table(title: str, rows: list[dict], with_snippet: bool = False, footer: str | None = None) -> None:
+    """
+    Render a page of emails as a Rich table.
+    """
+    console.print(build_email_table(title, rows, with_snippet, footer))
+
+
+def show_page(pager: Pager, rows: list[dict], db=None) -> None:
+    """
+    Render the current page of a pager with a navigation hint.
+
+    Rows that are not hydrated yet (semantic hits carry only id, subject and
+    date) are rendered at once and filled in live as hydration batches arrive
+    from `db`. The hydration time is added to the page timings.
+    """
+    hints = []
+    if pager.has_prev:
+        hints.append("/prev")
+    if pager.has_next:
+        hints.append("/next")
+    footer = f"Page {pager.page_number}" + (f" · {' '.join(hints)}" if hints else "")
+
+    if db is None or not pager.with_snippet or all("body" in row for row in rows):
+        render_email_table(pager.title, rows, with_snippet=pager.with_snippet, footer=footer)
+        return
+
+    start = time.perf_counter()
+    with Live(build_email_table(pager.title, rows, pager.with_snippet, footer), console=console, refresh_per_second=8) as live:
+        try:
+            for _ in hydrate_rows(db, rows):
+                live.update(build_email_table(pager.title, rows, pager.with_snippet, footer))
+        except Exception as e:
+            logger.error(f"Failed to hydrate search results: {e}")
+    pager.page_timings["hydrate_ms"] = (time.perf_counter() - start) * 1000
+
+
+def sync_forever(kb, db, thread_index: ThreadIndex, header_store: HeaderStore, header_ready: threading.Event, local_index: LocalVectorIndex | None, backfill: BackfillWorker, retention: RetentionState) -> None:
+    """
+    Keep the local header store, the knowledge base and the local vector index
+    in step with the email database while grepmail runs.
+    The historical backfill starts once the stores have caught up, as it adds
+    to them directly.
+    """
+    while True:
+        try:
+            sync_header_store(header_store, db)
+            header_ready.set()
+        except Exception as e:
+            logger.error(f"Failed to sync header store '{header_store.path}': {e}")
+        try:
+            ingest_emails_to_kb(kb, db, thread_index, retention=retention)
+        except Exception as e:
+            logger.error(f"Failed to sync knowledge base '{kb.name}': {e}")
+        if local_index is not None:
+            sync_local_index(local_index, db)
+        backfill.start()
+        time.sleep(SYNC_INTERVAL)
+
+
+def print_search_footer(timings: dict, backfill: BackfillWorker, thread_index: ThreadIndex) -> None:
+    """
+    Print the search timings and, while the mailbox is not fully indexed, how much of it is.
+    """
+    console.print(f"[dim]{format_timings(timings)}[/dim]")
+    coverage = backfill.coverage(thread_index.indexed)
+    if coverage:
+        console.print(f"[dim]{coverage}[/dim]")
+
+
+def print_help() -> None:
+    """
+    Print the list of available commands.
+    """
+    console.print(
+        Panel.fit(
+            "[bold yellow]/help[/bold yellow] - Show this help\n"
+            "[bold yellow]/bye[/bold yellow] or [bold yellow]/exit[/bold yellow] - Exit the program\n"
+            "[bold yellow]/clear[/bold yellow] - Clear the console\n"
+            "[bold yellow]/ls [n] [from:<addr>] [on:<yyyy-mm-dd>][/bold yellow] - List last n emails (default 5)\n"
+            "[bold yellow]/grep <pattern>[/bold yellow] - Regex search on email subjects\n"
+            "[bold yellow]/fzf <query>[/bold yellow] - Semantic search using vector embeddings\n"
+            "[bold yellow]/on <yyyy-mm-dd> <query>[/bold yellow] - Semantic search for emails on a specific date\n"
+            "[bold yellow]/from <addr|domain> <query>[/bold yellow] - Semantic search for emails from a sender\n"
+            "[bold yellow]/to <addr|domain> <query>[/bold yellow] - Semantic search for emails to a recipient\n"
+            "[bold yellow]/rerank [policy][/bold yellow] - Show or set the rerank policy (always, off, top, ambiguous)\n"
+            "[bold yellow]--rerank=<policy>[/bold yellow] - Override the rerank policy for a single search\n"
+            "[bold yellow]/next[/bold yellow] or [bold yellow]/prev[/bold yellow] - Page through the last /ls, /grep or search results\n"
+            "[bold yellow]/compact[/bold yellow] - Compact or drop old emails in the knowledge base per the retention tiers\n"
+            "[bold yellow]/status[/bold yellow] - Show background warm-up and backfill status\n"
+            "[bold yellow]/fetch <id>[/bold yellow] - Fetch entire email by id\n"
+            "[bold yellow]/gist <id>[/bold yellow] - Generate a gist for the email with the given id\n"
+            "\nOr just type your natural language query to search emails!",
+            title="📘 Commands",
+            border_style="blue"
+        )
+    )
+
+
 @app.command()
 def run():
     """🚀 grepmail: Query your emails with AI-powered semantic search"""
@@ -75,8 +239,10 @@ def run():
         email_kb = create_and_get_email_kb(project, EMAIL_ID)
         progress.update(task, completed=100)
 
-        task = progress.add_task("📤 Bulk inserting emails (if empty)...")
-        bulk_insert(project, email_kb, email_db, email_engine)
+        task = progress.add_task("📤 Inserting recent emails (if empty)...")
+        thread_index = ThreadIndex(get_thread_index_path(EMAIL_ID), owner=EMAIL_ID)
+        retention = RetentionState(get_retention_state_path(EMAIL_ID))
+        kb_rebuilt = bulk_insert(project, email_kb, email_db, email_engine, thread_index, get_recent_since(), retention=retention)
         progress.update(task, completed=100)
 
         task = progress.add_task("Creating knowledge base index...")
@@ -84,7 +250,7 @@ def run():
         progress.update(task, completed=100)
 
         task = progress.add_task("Creating jobs for email processing...")
-        create_jobs(project, email_kb, email_db, email_engine)
+        create_jobs(project, email_db, email_engine)
         progress.update(task, completed=100)
 
         task = progress.add_task("Setting up Gemini model...")
@@ -92,13 +258,53 @@ def run():
         gist_model = create_and_get_gist_model(project)
         progress.update(task, completed=100)
 
+    rerank_policy = get_rerank_policy(EMAIL_ID)
+    warmup_steps = [
+        ("embedding", lambda: embed_texts(["warm up"])),
+        ("kb probe", lambda: probe_email_kb(project, email_kb)),
+    ]
+    if rerank_policy != "off":
+        warmup_steps.append(("reranker", lambda: probe_email_kb(project, email_kb, reranking=True)))
+    if WARMUP_GIST:
+        # query_gist_model swallows errors, so a failed ping would show as done
+        warmup_steps.append(("gist", lambda: probe_gist_model(project)))
+    warmup = Warmup(warmup_steps).start()
+
+    local_index = None
+    if LOCAL_INDEX_MODE != "off":
+        local_index = LocalVectorIndex(get_local_index_path(EMAIL_ID))
+
+    header_store = HeaderStore(get_header_store_path(EMAIL_ID))
+    header_ready = threading.Event()
+    backfill = BackfillWorker(
+        get_backfill_state_path(EMAIL_ID),
+        step=lambda since, until: backfill_emails(
+            project, email_kb, email_db, email_engine, thread_index, since, until,
+            header_store=header_store, local_index=local_index, idle=backfill.idle, retention=retention,
+        ),
+        oldest=lambda: get_oldest_email_datetime(email_db),
+        mailbox_size=lambda: get_mailbox_size(EMAIL_ID, EMAIL_PWD),
+    )
+    if kb_rebuilt:
+        backfill.reset()
+    threading.Thread(
+        target=sync_forever,
+        args=(email_kb, email_db, thread_index, header_store, header_ready, local_index, backfill, retention),
+        daemon=True,
+    ).start()
+
     console.print("\n[bold green]✅ Setup complete! You can now search your emails.[/bold green]")
     console.print(
         "[bold yellow]Tip:[/bold yellow] Use [bold blue]/help[/bold blue] to see available commands.\n"
     )
 
+    pager: Pager | None = None
+
     while True:
+        # the backfill only runs while the user is at the prompt
+        backfill.resume()
         query = Prompt.ask("\n🔍 Enter a command or semantic query ([blue]/help[/blue] for options)")
+        backfill.pause()
         cmd = query.strip().lower()
 
         if cmd in ["/exit", "/bye"]:
@@ -106,127 +312,136 @@ def run():
             break
 
         elif cmd.startswith("/ls"):
-            try:
-                count = int(cmd.split(" ")[1]) if len(cmd.split(" ")) > 1 else 5
-            except ValueError:
-                count = 5
+            count, sender, day = 5, None, None
+            for arg in cmd.split(" ")[1:]:
+                if arg.startswith("from:"):
+                    sender = arg[len("from:"):]
+                elif arg.startswith("on:") and re.match(r"\d{4}-\d{2}-\d{2}$", arg[len("on:"):]):
+                    day = arg[len("on:"):]
+                elif arg.isdigit():
+                    count = int(arg)
+
+            if header_ready.is_set():
+                fetch_page = lambda cursor, count=count, sender=sender, day=day: header_store.latest_page(cursor, count, sender, day)
+            else:
+                fetch_page = lambda cursor, count=count, sender=sender, day=day: fetch_latest_emails_page(email_db, cursor, count, sender, day)
 
+            pager = Pager(fetch_page, title=f"🕐 Latest Emails ({count} per page)")
             with console.status("📬 Fetching latest emails...", spinner="dots"):
-                query_str = f"SELECT id, subject, from_field, datetime FROM {email_db.name}.emails ORDER BY datetime DESC LIMIT {count};"
-                res = query_email_db(email_db, query_str)
+                res = pager.next()
 
             if res:
-                table = Table(title=f"🕐 Last {count} Emails", show_lines=True)
-                table.add_column("ID", style="cyan")
-                table.add_column("Subject", style="cyan")
-                table.add_column("From", style="yellow")
-                table.add_column("Date", style="white")
-
-                for row in res:
-                    id = row.get("id")
-                    subject = row.get("subject", "No Subject")
-                    from_ = row.get("from_field", "Unknown").split(" ")[-1].strip("<>")
-                    date = row.get("datetime")
-                    if date:
-                        date = date.split(" ")[0]
-                    else:
-                        date = "Unknown Date"
-                    table.add_row(str(id), subject, from_, date)
-
-                console.print(table)
+                show_page(pager, res)
             else:
                 console.print("[bold red]No recent emails found.[/bold red]")
 
+        elif cmd in ["/next", "/prev"]:
+            if pager is None:
+                console.print("[red]Nothing to page through. Run /ls, /grep or a search first.[/red]")
+                continue
+
+            if cmd == "/next":
+                with console.status("📄 Loading next page...", spinner="dots"):
+                    res = pager.next()
+                if not res:
+                    console.print("[yellow]No more results.[/yellow]")
+                    continue
+            else:
+                res = pager.prev()
+                if not res:
+                    console.print("[yellow]Already on the first page.[/yellow]")
+                    continue
+
+            show_page(pager, res, email_db)
+
+        elif cmd == "/status":
+            table = Table(title="🔥 Warm-up", show_lines=True)
+            table.add_column("Step", style="cyan")
+            table.add_column("Status", style="yellow")
+            table.add_column("Time", style="white")
+            for name, step in warmup.status.items():
+                status = step["status"] if not step["error"] else f"{step['status']}: {step['error']}"
+                table.add_row(name, status, f"{step['ms']:.0f} ms" if step["ms"] is not None else "-")
+            console.print(table)
+            console.print(f"[bold blue]Backfill:[/bold blue] {backfill.coverage(thread_index.indexed) or 'mailbox fully indexed'}")
+
+        elif cmd == "/compact":
+            with console.status("🗜️ Compacting old emails in the knowledge base...", spinner="dots"):
+                try:
+                    report = compact_email_kb(project, email_kb, email_db, email_vs, thread_index, retention, local_index)
+                except Exception as e:
+                    logger.error(f"Failed to compact knowledge base '{email_kb.name}': {e}")
+                    console.print(f"[red]Error compacting knowledge base: {str(e)}[/red]")
+                    continue
+            console.print(f"[bold green]✅ {format_compaction(report)}[/bold green]")
+
+        elif cmd.startswith("/rerank"):
+            parts = cmd.split(" ")
+            if len(parts) > 1:
+                if parts[1] not in RERANK_POLICIES:
+                    console.print(f"[red]Usage: /rerank <{'|'.join(RERANK_POLICIES)}>[/red]")
+                    continue
+                rerank_policy = parts[1]
+            console.print(f"[bold blue]Rerank policy:[/bold blue] {rerank_policy}")
+
         elif cmd.startswith("/clear"):
             console.clear()
-            console.print(
-                Panel.fit(
-                    "[bold yellow]/help[/bold yellow] - Show this help\n"
-                    "[bold yellow]/bye[/bold yellow] or [bold yellow]/exit[/bold yellow] - Exit the program\n"
-                    "[bold yellow]/clear[/bold yellow] - Clear the console\n"
-                    "[bold yellow]/ls [n][/bold yellow] - List last n emails (default 5)\n"
-                    "[bold yellow]/grep <pattern>[/bold yellow] - Regex search on email subjects\n"
-                    "[bold yellow]/fzf <query>[/bold yellow] - Semantic search using vector embeddings\n"
-                    "[bold yellow]/on <yyyy-mm-dd> <query>[/bold yellow] - Semantic search for emails on a specific date\n"
-                    "[bold yellow]/fetch <id>[/bold yellow] - Fetch entire email by id\n"
-                    "[bold yellow]/gist <id>[/bold yellow] - Generate a gist for the email with the given id\n"
-                    "\nOr just type your natural language query to search emails!",
-                    title="📘 Commands",
-                    border_style="blue"
-                )
-            )
-            
+            print_help()
 
         elif cmd.startswith("/grep"):
-            import re
             pattern = query.replace("/grep", "").strip()
             if not pattern:
                 console.print("[red]Usage: /grep <regex_pattern>[/red]")
                 continue
 
-            with console.status("🧵 Grepping subjects...", spinner="dots"):
-                res = query_email_db(email_db, f"SELECT id, subject, from_field, datetime FROM {email_db.name}.emails;")
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                console.print(f"[red]Invalid pattern: {e}[/red]")
+                continue
 
-            matches = [row for row in res if re.search(pattern, row.get("subject", ""), re.IGNORECASE)]
+            if header_ready.is_set():
+                fetch_page = lambda cursor, pattern=pattern: header_store.grep_page(pattern, cursor, PAGE_SIZE)
+            else:
+                fetch_page = lambda cursor, pattern=pattern: grep_email_subjects_page(email_db, pattern, cursor, PAGE_SIZE)
 
-            if matches:
-                table = Table(title=f"🔎 Subjects matching /{pattern}/", show_lines=True)
-                table.add_column("ID", style="cyan")
-                table.add_column("Subject", style="cyan")
-                table.add_column("From", style="yellow")
-                table.add_column("Date", style="white")
-
-                for row in matches:
-                    id = row.get("id")
-                    subject = row.get("subject", "No Subject")
-                    from_ = row.get("from_field", "Unknown").split(" ")[-1].strip("<>")
-                    date = row.get("datetime")
-                    if date:
-                        date = date.split(" ")[0]
-                    else:
-                        date = "Unknown Date"
-                    table.add_row(str(id), subject, from_, date)
+            pager = Pager(fetch_page, title=f"🔎 Subjects matching /{pattern}/")
+            with console.status("🧵 Grepping subjects...", spinner="dots"):
+                matches = pager.next()
 
-                console.print(table)
+            if matches:
+                show_page(pager, matches)
             else:
                 console.print("[red]No matches found.[/red]")
 
         elif cmd.startswith("/fzf"):
-            query_term = query.replace("/fzf", "").strip()
+            query_term, query_policy = split_rerank_flag(query.replace("/fzf", "").strip())
             if not query_term:
                 console.print("[red]Usage: /fzf <semantic query>[/red]")
                 continue
 
+            pager = Pager(
+                semantic_page_fetcher(
+                    project, email_kb, email_db, query_term, PAGE_SIZE,
+                    local_index=local_index, rerank_policy=query_policy or rerank_policy,
+                ),
+                title=f"🧠 Semantic Results for: {query_term}",
+                with_snippet=True,
+            )
             with console.status("🤖 Performing semantic search...", spinner="dots"):
-                results = query_email_kb(project, email_kb, email_db, query_term, 10)
+                results = pager.next()
 
             if results:
-                table = Table(title=f"🧠 Semantic Results for: {query_term}", show_lines=True)
-                table.add_column("ID", style="cyan")
-                table.add_column("Subject", style="bold cyan")
-                table.add_column("From", style="yellow")
-                table.add_column("Date", style="white")
-                table.add_column("Snippet", style="dim", overflow="fold")
-
-                for email in results:
-                    id = email.get("id")
-                    subject = email.get("subject", "No Subject")[:100] + "..."
-                    from_ = email.get("from_field", "Unknown").split(" ")[-1].strip("<>")
-                    date = email.get("datetime")
-                    if date:
-                        date = date.split(" ")[0]
-                    else:
-                        date = "Unknown Date"
-                    snippet = email.get("body", "").strip().replace("\n", " ")[:100] + "..."
-                    table.add_row(str(id), subject, from_, date, snippet)
-
-                console.print(table)
+                show_page(pager, results, email_db)
+                print_search_footer(pager.page_timings, backfill, thread_index)
             else:
                 console.print("[red]No semantic results found.[/red]")
 
         elif cmd.startswith("/on "):
             parts = cmd.split(" ", 2)
-            if len(parts) < 3:
+            if len(parts) == 3:
+                parts[2], query_policy = split_rerank_flag(parts[2])
+            if len(parts) < 3 or not parts[2]:
                 console.print("[red]Usage: /on <yyyy-mm-dd> <query>[/red]")
                 continue
 
@@ -236,33 +451,51 @@ def run():
                 console.print("[red]Date must be in YYYY-MM-DD format.[/red]")
                 continue
 
+            pager = Pager(
+                semantic_page_fetcher(
+                    project, email_kb, email_db, user_query, PAGE_SIZE, date_filter,
+                    local_index=local_index, rerank_policy=query_policy or rerank_policy,
+                ),
+                title=f"🧠 Results for '{user_query}' on {date_filter}",
+                with_snippet=True,
+            )
             with console.status(f"🔍 Searching for emails on [bold]{date_filter}[/bold]...", spinner="dots"):
-                results = query_email_kb(project, email_kb, email_db, user_query, 10, date_filter)
+                results = pager.next()
 
             if results:
-                table = Table(title=f"🧠 Results for '{user_query}' on {date_filter}", show_lines=True)
-                table.add_column("ID", style="cyan")
-                table.add_column("Subject", style="cyan")
-                table.add_column("From", style="yellow")
-                table.add_column("Date", style="white")
-                table.add_column("Snippet", style="dim")
-
-                for email in results:
-                    id = email.get("id")
-                    subject = email.get("subject", "No Subject")[:100] + "..."
-                    from_ = email.get("from_field", "Unknown").split(" ")[-1].strip("<>")
-                    date = email.get("datetime")
-                    if date:
-                        date = date.split(" ")[0]
-                    else:
-                        date = "Unknown Date"
-                    snippet = email.get("body", "").strip().replace("\n", " ")[:100] + "..."
-                    table.add_row(str(id), subject, from_, date, snippet)
-
-                console.print(table)
+                show_page(pager, results, email_db)
+                print_search_footer(pager.page_timings, backfill, thread_index)
             else:
                 console.print("[red]No results for that date/query.[/red]")
 
+        elif cmd.startswith("/from ") or cmd.startswith("/to "):
+            parts = query.strip().split(" ", 2)
+            if len(parts) == 3:
+                parts[2], query_policy = split_rerank_flag(parts[2])
+            if len(parts) < 3 or not parts[2]:
+                console.print(f"[red]Usage: {parts[0].lower()} <address|domain> <query>[/red]")
+                continue
+
+            direction, correspondent, user_query = parts[0].lower(), parts[1], parts[2]
+            filters = {"sender": correspondent} if direction == "/from" else {"recipient": correspondent}
+
+            pager = Pager(
+                semantic_page_fetcher(
+                    project, email_kb, email_db, user_query, PAGE_SIZE,
+                    local_index=local_index, rerank_policy=query_policy or rerank_policy, **filters,
+                ),
+                title=f"🧠 Results for '{user_query}' {direction.lstrip('/')} {correspondent}",
+                with_snippet=True,
+            )
+            with console.status(f"🔍 Searching emails {direction.lstrip('/')} [bold]{correspondent}[/bold]...", spinner="dots"):
+                results = pager.next()
+
+            if results:
+                show_page(pager, results, email_db)
+                print_search_footer(pager.page_timings, backfill, thread_index)
+            else:
+                console.print("[red]No results for that correspondent/query.[/red]")
+
         elif cmd.startswith("/fetch "):
             parts = cmd.split(" ", 1)
             if len(parts) < 2 or not parts[1].isdigit():
@@ -319,51 +552,25 @@ def run():
                     console.print(f"[red]Error generating gist: {str(e)}[/red]")
 
         elif cmd in ["/help", "help"]:
-            console.print(
-                Panel.fit(
-                    "[bold yellow]/help[/bold yellow] - Show this help\n"
-                    "[bold yellow]/bye[/bold yellow] or [bold yellow]/exit[/bold yellow] - Exit the program\n"
-                    "[bold yellow]/clear[/bold yellow] - Clear the console\n"
-                    "[bold yellow]/ls [n][/bold yellow] - List last n emails (default 5)\n"
-                    "[bold yellow]/grep <pattern>[/bold yellow] - Regex search on email subjects\n"
-                    "[bold yellow]/fzf <query>[/bold yellow] - Semantic search using vector embeddings\n"
-                    "[bold yellow]/on <yyyy-mm-dd> <query>[/bold yellow] - Semantic search for emails on a specific date\n"
-                    "[bold yellow]/fetch <id>[/bold yellow] - Fetch entire email by id\n"
-                    "[bold yellow]/gist <id>[/bold yellow] - Generate a gist for the email with the given id\n"
-                    "\nOr just type your natural language query to search emails!",
-                    title="📘 Commands",
-                    border_style="blue"
-                )
-            )
+            print_help()
 
         else:
+            query, query_policy = split_rerank_flag(query)
+            pager = Pager(
+                semantic_page_fetcher(
+                    project, email_kb, email_db, query, PAGE_SIZE,
+                    local_index=local_index, rerank_policy=query_policy or rerank_policy,
+                ),
+                title="📧 Email Results",
+                with_snippet=True,
+            )
             with console.status("🤖 Thinking...", spinner="dots"):
-                results = query_email_kb(project, email_kb, email_db, query, 10)
+                results = pager.next()
 
             if results:
                 console.print(f"\n[bold blue]📨 Found {len(results)} matching emails:[/bold blue]\n")
-
-                table = Table(title="📧 Email Results", show_lines=True, title_style="bold green")
-                table.add_column("ID", style="cyan")
-                table.add_column("Subject", style="bold cyan")
-                table.add_column("From", style="yellow")
-                table.add_column("Date", style="white")
-                table.add_column("Snippet", style="dim", overflow="fold")
-
-                for email in results:
-                    id = email.get("id")
-                    subject = email.get("subject", "No Subject")[:100] + "..."
-                    from_ = email.get("from_field", "Unknown").split(" ")[-1].strip("<>")
-                    date = email.get("datetime")
-                    if date:
-                        date = date.split(" ")[0]
-                    else:
-                        date = "Unknown Date"
-                    content_snippet = email.get("body", "").strip().replace("\n", " ")[:100] + "..."
-
-                    table.add_row(str(id), subject, from_, str(date), content_snippet)
-
-                console.print(table)
+                show_page(pager, results, email_db)
+                print_search_footer(pager.page_timings, backfill, thread_index)
             else:
                 console.print("[bold red]No results found.[/bold red]")
 
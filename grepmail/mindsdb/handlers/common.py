@@ -86,9 +86,9 @@ def create_and_get_gist_model(project: Project) -> Model | None:
         return None
 
 
-def query_gist_model(project: Project, email_content: str) -> str:
+def probe_gist_model(project: Project, email_content: str = "Subject: ping\nping") -> str:
     """
-    Query the Gist model to generate a summary of the email content.
+    Query the Gist model, raising on failure, e.g. to warm it up.
 
     Args:
         project (Project): The MindsDB project instance.
@@ -100,9 +100,23 @@ def query_gist_model(project: Project, email_content: str) -> str:
     query = f"""SELECT response FROM gist_generator
     WHERE email_content = '{email_content}';"""
 
+    result = project.query(query).fetch()
+    return result.to_dict(orient='records')[0]['response']
+
+
+def query_gist_model(project: Project, email_content: str) -> str:
+    """
+    Query the Gist model to generate a summary of the email content.
+
+    Args:
+        project (Project): The MindsDB project instance.
+        email_content (str): The content of the email to summarize.
+
+    Returns:
+        str: The generated summary.
+    """
     try:
-        result = project.query(query).fetch()
-        return result.to_dict(orient='records')[0]['response']
+        return probe_gist_model(project, email_content)
     except Exception as e:
         logger.error(f"Failed to query Gist model: {e}")
         return "Error generating summary."
\ No newline at end of file
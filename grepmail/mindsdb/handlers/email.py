@@ -1,4 +1,11 @@
+import imaplib
+import json
 import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
 from typing import List
 
 from dotenv import load_dotenv
@@ -7,9 +14,23 @@ from mindsdb_sdk.databases import Database
 from mindsdb_sdk.projects import Project
 from mindsdb_sdk.knowledge_bases import KnowledgeBase
 from mindsdb_sdk.jobs import Job
+import pandas as pd
 from pandas import DataFrame
 
-from grepmail.logger import logger
+from grepmail.header_store import HeaderStore, get_sender_address
+from grepmail.logger import log_query, logger
+from grepmail.overfetch import MAX_CHUNK_FETCH, aggregate_chunk_scores, overfetch
+from grepmail.rerank import RERANK_TOP_N, is_ambiguous, rerank_cache
+from grepmail.retention import COMPACT_GRANULARITY, COMPACT_WINDOW_DAYS, RetentionState, compact_text, get_cutoffs, get_tier
+from grepmail.threads import ThreadIndex, collapse_threads, get_addresses, strip_quoted
+from grepmail.vector_index import (
+    APPROX_MIN_ROWS,
+    LOCAL_INDEX_MODE,
+    LocalVectorIndex,
+    email_to_text,
+    embed_texts,
+    search_local_index,
+)
 
 # Load environment variables
 load_dotenv()
@@ -25,6 +46,9 @@ POSTGRES_PORT = int(os.getenv('POSTGRES_PORT'))
 POSTGRES_USER = os.getenv('POSTGRES_USER')
 POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD')
 POSTGRES_DB = os.getenv('POSTGRES_DB')
+POSTGRES_SCHEMA = os.getenv('POSTGRES_SCHEMA', 'data')
+
+_hydrate_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="grepmail-hydrate")
 
 
 def get_email_engine_name(email: str) -> str:
@@ -104,7 +128,7 @@ def create_and_get_email_db(server: Server, email: str) -> Database | None:
                 "port": POSTGRES_PORT,
                 "password": POSTGRES_PASSWORD,
                 "database": POSTGRES_DB,
-                "schema": "data",
+                "schema": POSTGRES_SCHEMA,
             }
         )
 
@@ -150,7 +174,7 @@ def query_email_db(db: Database, query: str) -> dict[str, list] | None:
         query (str): The SQL query to execute on the email database.
     """
     if db:
-        logger.info(f"Querying email database '{db.name}' with query: {query}")
+        log_query(db.name, query)
         df = db.query(query).fetch()
         if df.empty:
             return None
@@ -259,7 +283,7 @@ USING
         "api_key": "{GEMINI_API_KEY}"
     }},
     storage = {vs_name}.storage_table,
-    metadata_columns = ['subject', 'datetime'],
+    metadata_columns = ['subject', 'datetime', 'thread_id', 'sender', 'sender_domain', 'recipients'],
     content_columns = ['body', 'from_field', 'to_field'],
     id_column = 'id';
 """
@@ -278,91 +302,868 @@ USING
     return project.knowledge_bases.get(kb_name)
 
 
-def bulk_insert(project: Project, kb: KnowledgeBase, db: Database, engine: Database) -> None:
+def _engine_window(since: str, until: str | None = None) -> str:
     """
-    Bulk insert emails into the knowledge base.
+    Build the date conditions for a query on the email engine.
+
+    The engine only pushes `>` and `<` on `datetime` down to IMAP SINCE and
+    BEFORE, which match whole days, and rejects other operators. The window
+    is therefore widened to whole days on both ends; callers filter the exact
+    bounds on the result.
+    """
+    conditions = [f"datetime > '{(date.fromisoformat(since[:10]) - timedelta(days=1)).isoformat()}'"]
+    if until:
+        conditions.append(f"datetime < '{(date.fromisoformat(until[:10]) + timedelta(days=1)).isoformat()}'")
+    return " AND ".join(conditions)
+
+
+def bulk_insert(project: Project, kb: KnowledgeBase, db: Database, engine: Database, thread_index: ThreadIndex, since: str | None = None, retention: RetentionState | None = None) -> bool:
+    """
+    Bulk insert emails into the database and the knowledge base.
     To be used only when inserting data for the first time.
 
+    With `since`, only mail from that day on is inserted so the prompt is
+    available quickly; older mail is left to `backfill_emails`.
+
+    An empty knowledge base (first run, or recreated by the user) is rebuilt
+    from the whole database, so the thread index is reset first; its watermark
+    would otherwise skip everything ingested before.
+
     Args:
         project (Project): The MindsDB project instance.
         kb (KnowledgeBase): The MindsDB knowledge base instance.
         db (Database): The MindsDB database instance.
         engine (Database): The MindsDB email engine instance.
-    """
-    kb_empty_query = f"SELECT * FROM {kb.name} LIMIT 1;"
-    res = project.query(kb_empty_query).fetch()
-    if res.empty:
-        insert_query = f"""INSERT INTO {kb.name}
-            SELECT *
-            FROM {engine.name}.emails
-            LIMIT 100
-            USING
-                kb_no_upsert = true,
-                batch_size = 50,
-                threads = 1,
-                track_column = id;
-        """
-        project.query(insert_query).fetch()
+        thread_index (ThreadIndex): The thread index used to group the emails.
+        since (str | None): Optional first day (yyyy-mm-dd) to insert.
+        retention (RetentionState | None): Optional retention state, see `insert_rows_to_kb`.
 
+    Returns:
+        bool: Whether the knowledge base was empty and has been rebuilt.
+    """
     db_empty_query = f"SELECT * FROM {db.name}.emails LIMIT 1;"
     res = project.query(db_empty_query).fetch()
     if res.empty:
+        source = f"{engine.name}.emails"
+        where = ""
+        if since:
+            # the engine is queried in whole days, the exact bound is applied on top
+            source = f"(SELECT * FROM {engine.name}.emails WHERE {_engine_window(since)}) AS recent_emails"
+            where = f"WHERE datetime >= '{since}'"
         insert_query = f"""INSERT INTO {db.name}.emails
             SELECT *
-            FROM {engine.name}.emails
-            LIMIT 100;
+            FROM {source}
+            {where};
         """
         
         project.query(insert_query).fetch()
 
+    kb_empty_query = f"SELECT * FROM {kb.name} LIMIT 1;"
+    res = project.query(kb_empty_query).fetch()
+    if res.empty:
+        thread_index.reset()
+        ingest_emails_to_kb(kb, db, thread_index, retention=retention)
+        return True
+    return False
+
 
-def query_email_kb(project: Project, kb: KnowledgeBase, db: Database, query: str, limit: int, dt_filter: str | None = None) -> List[dict] | None:
+def _kb_record(row: dict, body: str, thread_id: int | None) -> dict:
     """
-    Query the email knowledge base.
+    Build the knowledge base record of an email row with the given content.
+    """
+    sender = get_sender_address(row.get("from_field"))
+    return {
+        "id": row["id"],
+        "body": body,
+        "from_field": row.get("from_field"),
+        "to_field": row.get("to_field"),
+        "subject": row.get("subject"),
+        "datetime": str(row.get("datetime")),
+        "thread_id": thread_id,
+        "sender": sender,
+        "sender_domain": sender.rsplit("@", 1)[-1],
+        # delimited on both ends so a single address can be matched exactly with LIKE
+        "recipients": f",{','.join(sorted(get_addresses(row.get('to_field'))))},",
+    }
+
+
+def insert_rows_to_kb(kb: KnowledgeBase, rows: List[dict], thread_index: ThreadIndex, retention: RetentionState | None = None) -> int:
+    """
+    Insert email rows into the knowledge base.
+
+    Each email is assigned to a conversation thread and only its new content
+    (the body without the quoted reply history) is embedded, so long reply
+    chains are not stored once per message. The thread id is stored as chunk
+    metadata for collapsing results at query time, along with the normalised
+    sender address, sender domain and recipients for exact-match filters.
+
+    Emails are stored according to their retention tier: recent mail in full,
+    older mail compacted to a single chunk, and mail past the retention cutoff
+    not at all (see `grepmail.retention`). Compacted mail is stored per
+    message; with `thread` granularity it is marked in `retention` so that
+    `compact_email_kb` later merges it into its threads.
+
+    The thread index watermark only moves past the rows once the insert has
+    succeeded, so a failed insert is retried by the next ingestion.
+
+    Args:
+        kb (KnowledgeBase): The MindsDB knowledge base instance.
+        rows (List[dict]): The email rows.
+        thread_index (ThreadIndex): The thread index used to group the emails.
+        retention (RetentionState | None): Optional retention state to mark compacted mail in.
+
+    Returns:
+        int: The number of quoted characters left out.
+    """
+    records, quoted_chars, compacted_days = [], 0, []
+    cutoffs = get_cutoffs()
+    for row in rows:
+        body = row.get("body") or ""
+        new_content = strip_quoted(body)
+        quoted_chars += len(body) - len(new_content)
+        thread_id = thread_index.assign(row)
+        tier = get_tier(row.get("datetime"), cutoffs)
+        if tier == "drop":
+            continue
+        if tier == "compact":
+            new_content = compact_text(row.get("subject"), [new_content])
+            compacted_days.append(str(row.get("datetime"))[:10])
+        records.append(_kb_record(row, new_content, thread_id))
+    if records:
+        kb.insert(DataFrame(records))
+        thread_index.mark_indexed([record["id"] for record in records])
+    thread_index.advance([row["id"] for row in rows])
+    thread_index.save()
+    if retention is not None and compacted_days and COMPACT_GRANULARITY == "thread":
+        retention.mark_for_recompaction(min(compacted_days))
+    return quoted_chars
+
+
+def ingest_emails_to_kb(kb: KnowledgeBase, db: Database, thread_index: ThreadIndex, batch_size: int = 50, retention: RetentionState | None = None) -> int:
+    """
+    Insert emails newer than the thread index watermark into the knowledge base.
+
+    Args:
+        kb (KnowledgeBase): The MindsDB knowledge base instance.
+        db (Database): The MindsDB database instance.
+        thread_index (ThreadIndex): The thread index used to group the emails.
+        batch_size (int): The number of emails inserted per request.
+        retention (RetentionState | None): Optional retention state, see `insert_rows_to_kb`.
+
+    Returns:
+        int: The number of emails inserted.
+    """
+    inserted = quoted_chars = 0
+    while True:
+        rows = query_email_db(db, f"""SELECT *
+FROM {db.name}.emails
+WHERE id > {thread_index.watermark}
+ORDER BY id
+LIMIT {batch_size};""")
+        if not rows:
+            break
+
+        quoted_chars += insert_rows_to_kb(kb, rows, thread_index, retention)
+        inserted += len(rows)
+
+    if inserted:
+        logger.info(f"Inserted {inserted} emails into knowledge base '{kb.name}', skipping {quoted_chars} quoted characters.")
+    return inserted
+
+
+def get_oldest_email_datetime(db: Database) -> str | None:
+    """
+    Return the datetime of the oldest email in the database, or None when it is empty.
+    """
+    rows = query_email_db(db, f"SELECT datetime FROM {db.name}.emails ORDER BY datetime ASC LIMIT 1;")
+    return str(rows[0]["datetime"]) if rows else None
+
+
+def get_mailbox_size(email: str, password: str, mailbox: str = "INBOX") -> int | None:
+    """
+    Return the number of emails in a mailbox, as reported by the IMAP server on select.
+
+    Args:
+        email (str): The email address.
+        password (str): The password for the email account.
+        mailbox (str): The mailbox the email engine reads from.
+    """
+    try:
+        client = imaplib.IMAP4_SSL(IMAP_SERVER)
+        client.login(email, password)
+        _, data = client.select(mailbox, readonly=True)
+        client.logout()
+        return int(data[0])
+    except Exception as e:
+        logger.error(f"Failed to get size of mailbox '{mailbox}': {e}")
+        return None
+
+
+def backfill_emails(project: Project, kb: KnowledgeBase, db: Database, engine: Database, thread_index: ThreadIndex, since: str, until: str, header_store: HeaderStore | None = None, local_index: LocalVectorIndex | None = None, idle: threading.Event | None = None, batch_size: int = 50, retention: RetentionState | None = None) -> int:
+    """
+    Ingest the emails sent in [since, until) from the email engine into the
+    database, the knowledge base and the local stores.
+
+    These emails are older than everything ingested so far, so their ids are
+    below the sync watermarks and they are added here directly rather than by
+    the hourly syncs. A window left half done by a previous run is cleared
+    from the database first and emails the local stores already hold are
+    skipped, so retrying a window doesn't duplicate it.
 
     Args:
         project (Project): The MindsDB project instance.
         kb (KnowledgeBase): The MindsDB knowledge base instance.
-        query (str): The SQL query to execute on the knowledge base.
+        db (Database): The MindsDB database instance.
+        engine (Database): The MindsDB email engine instance.
+        thread_index (ThreadIndex): The thread index used to group the emails.
+        since (str): The first day (yyyy-mm-dd) of the window.
+        until (str): The end of the window, exclusive.
+        header_store (HeaderStore | None): Optional local header store to add the headers to.
+        local_index (LocalVectorIndex | None): Optional local vector index to add the emails to.
+        idle (threading.Event | None): Waited on before every batch, cleared while the user runs a query.
+        batch_size (int): The number of emails inserted into the knowledge base per request.
+        retention (RetentionState | None): Optional retention state, see `insert_rows_to_kb`.
+
+    Returns:
+        int: The number of emails ingested.
     """
+    window = f"datetime >= '{since}' AND datetime < '{until}'"
+    project.query(f"DELETE FROM {db.name}.emails WHERE {window};").fetch()
+    # the engine is queried in whole days, the exact window is applied on top
+    insert_query = f"""INSERT INTO {db.name}.emails
+SELECT *
+FROM (
+    SELECT *
+    FROM {engine.name}.emails
+    WHERE {_engine_window(since, until)}
+) AS window_emails
+WHERE {window};"""
+    project.query(insert_query).fetch()
+
+    rows = query_email_db(db, f"SELECT * FROM {db.name}.emails WHERE {window} ORDER BY id;") or []
+    ids = [int(row["id"]) for row in rows]
+    known_headers = header_store.contains(ids) if header_store is not None else set()
+    known_vectors = local_index.contains(ids) if local_index is not None else set()
+    cutoffs = get_cutoffs()
+    for i in range(0, len(rows), batch_size):
+        if idle is not None:
+            idle.wait()
+        batch = rows[i:i + batch_size]
+        insert_rows_to_kb(kb, batch, thread_index, retention)
+        if header_store is not None:
+            header_store.add([row for row in batch if int(row["id"]) not in known_headers])
+        # dropped mail is kept out of the local index, as it is kept out of the knowledge base
+        new_rows = [row for row in batch if int(row["id"]) not in known_vectors and get_tier(row["datetime"], cutoffs) != "drop"]
+        if local_index is not None and new_rows:
+            vectors = embed_texts([email_to_text(row) for row in new_rows])
+            local_index.add([row["id"] for row in new_rows], vectors, [row["datetime"] for row in new_rows])
+
+    if rows:
+        logger.info(f"Backfilled {len(rows)} emails sent between {since} and {until}.")
+    return len(rows)
+
+
+def fetch_latest_emails_page(db: Database, cursor: tuple | None, limit: int, sender: str | None = None, day: str | None = None) -> tuple[List[dict], tuple | None]:
+    """
+    Fetch a page of email headers, newest first, using keyset pagination on (datetime, id).
+
+    Args:
+        db (Database): The MindsDB database instance.
+        cursor (tuple | None): The (datetime, id) of the last row of the previous page.
+        limit (int): The number of emails per page.
+        sender (str | None): Optional text the From header (display name or address) must
+            contain, case-insensitively (the same matching as `HeaderStore.latest_page`).
+        day (str | None): Optional day (yyyy-mm-dd) to filter on.
+
+    Returns:
+        tuple: The rows of the page and the cursor of the next page (None when exhausted).
+    """
+    conditions = []
+    if cursor is not None:
+        dt, last_id = cursor
+        conditions.append(f"(datetime < '{dt}' OR (datetime = '{dt}' AND id < {last_id}))")
+    if sender:
+        conditions.append(f"LOWER(from_field) LIKE '%{sender.lower()}%'")
+    if day:
+        conditions.append(f"datetime LIKE '{day}%'")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    query = f"""SELECT id, subject, from_field, datetime
+FROM {db.name}.emails
+{where}
+ORDER BY datetime DESC, id DESC
+LIMIT {limit};"""
+    rows = query_email_db(db, query) or []
+    if len(rows) < limit:
+        return rows, None
+    return rows, (rows[-1]["datetime"], rows[-1]["id"])
+
+
+def grep_email_subjects_page(db: Database, pattern: str, cursor: tuple | None, limit: int, scan_size: int = 500) -> tuple[List[dict], tuple | None]:
+    """
+    Fetch a page of emails whose subject matches a regex, newest first.
+    Headers are scanned in keyset order in batches of `scan_size`, so every
+    page resumes exactly where the previous one stopped.
+
+    Args:
+        db (Database): The MindsDB database instance.
+        pattern (str): The regex pattern to match against subjects.
+        cursor (tuple | None): The (datetime, id) of the last scanned row.
+        limit (int): The number of matches per page.
+        scan_size (int): The number of headers fetched per round trip.
+
+    Returns:
+        tuple: The matching rows and the cursor of the next page (None when exhausted).
+    """
+    regex = re.compile(pattern, re.IGNORECASE)
+    matches = []
+    while True:
+        rows, next_cursor = fetch_latest_emails_page(db, cursor, scan_size)
+        for row in rows:
+            cursor = (row["datetime"], row["id"])
+            if regex.search(row.get("subject") or ""):
+                matches.append(row)
+                if len(matches) == limit:
+                    return matches, cursor
+        if next_cursor is None:
+            return matches, None
+
+
+def hydrate_emails(db: Database, ids: List[int]) -> List[dict]:
+    """
+    Fetch the full emails for the given ids in a single query, preserving the order of `ids`.
+
+    Args:
+        db (Database): The MindsDB database instance.
+        ids (List[int]): The email ids to fetch.
+    """
+    if not ids:
+        return []
+    id_list = ", ".join(str(i) for i in ids)
+    rows = query_email_db(db, f"SELECT * FROM {db.name}.emails WHERE id IN ({id_list});") or []
+    by_id = {int(row["id"]): row for row in rows}
+    return [by_id[int(i)] for i in ids if int(i) in by_id]
+
+
+def _get_metadata(metadata) -> dict:
+    """
+    Parse the metadata column of a knowledge base row.
+    """
+    if isinstance(metadata, dict):
+        return metadata
+    try:
+        return json.loads(metadata) if metadata else {}
+    except (TypeError, ValueError):
+        return {}
+
+
+def build_metadata_conditions(dt_filter: str | None = None, sender: str | None = None, recipient: str | None = None) -> List[str]:
+    """
+    Build the knowledge base metadata conditions for the search filters.
+
+    Args:
+        dt_filter (str | None): Optional date prefix (yyyy-mm-dd) to filter on.
+        sender (str | None): Optional sender address, or domain (`example.com` or `@example.com`).
+        recipient (str | None): Optional recipient address, or domain.
+
+    Returns:
+        List[str]: The conditions, to be joined with AND.
+    """
+    conditions = []
     if dt_filter:
-        select_query = f"""SELECT *
+        conditions.append(f"datetime LIKE '{dt_filter}%'")
+    if sender:
+        sender = sender.lower().lstrip("@")
+        column = "sender" if "@" in sender else "sender_domain"
+        conditions.append(f"{column} = '{sender}'")
+    if recipient:
+        recipient = recipient.lower().lstrip("@")
+        pattern = f",{recipient}," if "@" in recipient else f"@{recipient},"
+        conditions.append(f"recipients LIKE '%{pattern}%'")
+    return conditions
+
+
+def rerank_chunks(project: Project, kb: KnowledgeBase, query: str, df: DataFrame, policy: str, timings: dict, dt_filter: str | None = None) -> DataFrame:
+    """
+    Rerank the best vector hits with the knowledge base reranker, within a budget.
+
+    Only the top `RERANK_TOP_N` chunks are considered, and with the `ambiguous`
+    policy only when their vector scores are too close to trust. Scores are
+    cached by (query, chunk id), so only unseen chunks cost a rerank call.
+    The rerank query filters on email ids, so its limit covers every chunk of
+    those emails; only scores the reranker actually returned are cached.
+
+    Args:
+        project (Project): The MindsDB project instance.
+        kb (KnowledgeBase): The MindsDB knowledge base instance.
+        query (str): The natural language query.
+        df (DataFrame): The vector hits (id, chunk_id, distance), best first.
+        policy (str): The rerank policy, `top` or `ambiguous`.
+        timings (dict): Dict collecting rerank timings and counts.
+        dt_filter (str | None): Optional date prefix (yyyy-mm-dd) to filter on.
+
+    Returns:
+        DataFrame: The hits with the reranked top chunks scored above all others.
+    """
+    top, rest = df.head(RERANK_TOP_N), df.iloc[RERANK_TOP_N:]
+    if policy == "ambiguous" and not is_ambiguous(1 - top["distance"]):
+        return df
+
+    start = time.perf_counter()
+    scores = {cid: rerank_cache.get(query, cid) for cid in top["chunk_id"]}
+    missing = [cid for cid, score in scores.items() if score is None]
+    timings["reranked"] = len(scores)
+    timings["rerank_cache_hits"] = len(scores) - len(missing)
+
+    if missing:
+        missing_ids = ", ".join(str(i) for i in top[top["chunk_id"].isin(missing)]["id"].unique())
+        date_clause = f"\nAND datetime LIKE '{dt_filter}%'" if dt_filter else ""
+        chunks = project.query(f"SELECT chunk_id FROM {kb.name} WHERE id IN ({missing_ids});").fetch()
+        rerank_query = f"""SELECT chunk_id, relevance
 FROM {kb.name}
-WHERE datetime LIKE '{dt_filter}%'
-AND content = '{query}'
-LIMIT {limit}
+WHERE content = '{query}'
+AND id IN ({missing_ids}){date_clause}
+LIMIT {max(len(chunks), len(missing))}
 USING
-    threads = 1;
+    threads = 1,
+    reranking = true;
 """
-    else:
-        select_query = f"""SELECT *
+        logger.info(f"Reranking {len(missing)} chunks of knowledge base '{kb.name}'.")
+        log_query(kb.name, rerank_query)
+        reranked = project.query(rerank_query).fetch()
+        relevance = dict(zip(reranked["chunk_id"], reranked["relevance"])) if not reranked.empty else {}
+        for cid in missing:
+            scores[cid] = float(relevance.get(cid, 0.0))
+            if cid in relevance:
+                rerank_cache.set(query, cid, scores[cid])
+
+    # reranked chunks outrank every chunk that was only scored by vector similarity
+    top = top.assign(score=1 + top["chunk_id"].map(scores)).sort_values("score", ascending=False, kind="stable")
+    timings["rerank_ms"] = (time.perf_counter() - start) * 1000
+    return pd.concat([top, rest])
+
+
+def search_email_kb(project: Project, kb: KnowledgeBase, query: str, limit: int, dt_filter: str | None = None, local_index: LocalVectorIndex | None = None, rerank_policy: str = "always", timings: dict | None = None, sender: str | None = None, recipient: str | None = None) -> List[dict]:
+    """
+    Run a semantic search on the email knowledge base and return up to `limit`
+    distinct emails, best match first, as partial rows built from the chunk
+    metadata (`id`, `subject`, `datetime`) so they can be shown before hydration.
+
+    Chunks are over-fetched by the learned chunks-per-email ratio, grouped by
+    email (max or sum of chunk scores, see `GREPMAIL_SCORE_AGGREGATION`) and
+    collapsed per thread. If that still leaves fewer than `limit` emails while
+    more chunks exist, one bounded top-up fetch is made.
+
+    When a local index is given it answers the query according to
+    `GREPMAIL_LOCAL_INDEX`: always (`prefer`) or only when the knowledge base
+    query fails (`fallback`). The local index has no sender or recipient
+    metadata, so it is not used for searches filtered on them.
+
+    Sender and recipient filters are exact matches on chunk metadata and are
+    applied by the vector store before ranking, so only that correspondent's
+    chunks are scored.
+
+    Args:
+        project (Project): The MindsDB project instance.
+        kb (KnowledgeBase): The MindsDB knowledge base instance.
+        query (str): The natural language query.
+        limit (int): The number of distinct emails wanted.
+        dt_filter (str | None): Optional date prefix (yyyy-mm-dd) to filter on.
+        local_index (LocalVectorIndex | None): Optional local copy of the embeddings.
+        rerank_policy (str): One of `RERANK_POLICIES`.
+        timings (dict | None): Optional dict filled with vector and rerank timings.
+        sender (str | None): Optional sender address or domain to filter on.
+        recipient (str | None): Optional recipient address or domain to filter on.
+    """
+    timings = timings if timings is not None else {}
+    timings.clear()
+    timings["policy"] = rerank_policy
+
+    use_local = local_index is not None and local_index.count > 0 and not (sender or recipient)
+    if use_local and LOCAL_INDEX_MODE == "prefer":
+        timings["policy"] = "local"
+        return [{"id": i} for i in search_local_index(local_index, query, limit, dt_filter, since=get_cutoffs()[1])]
+
+    where_clause = "".join(f"{condition}\nAND " for condition in build_metadata_conditions(dt_filter, sender, recipient))
+    reranking = "true" if rerank_policy == "always" else "false"
+
+    def fetch_chunks(chunk_limit: int) -> DataFrame:
+        select_query = f"""SELECT id, chunk_id, distance, relevance, metadata
 FROM {kb.name}
-WHERE content = '{query}'
-LIMIT {limit}
+WHERE {where_clause}content = '{query}'
+LIMIT {chunk_limit}
 USING
-    threads = 1;
+    threads = 1,
+    reranking = {reranking};
 """
-    logger.info(f"Querying knowledge base '{kb.name}' with query: {select_query}")
+        log_query(kb.name, select_query)
+        start = time.perf_counter()
+        df = project.query(select_query).fetch()
+        timings["vector_ms"] = timings.get("vector_ms", 0) + (time.perf_counter() - start) * 1000
+        timings["round_trips"] = timings.get("round_trips", 0) + 1
+        if not df.empty:
+            # the knowledge base may return ids as strings; the database ids are ints
+            df["id"] = df["id"].astype(int)
+            df["metadata"] = [_get_metadata(m) for m in df["metadata"]]
+            df["thread_id"] = [int(m["thread_id"]) if m.get("thread_id") is not None else None for m in df["metadata"]]
+        return df
 
+    def distinct_threads(df: DataFrame) -> int:
+        if df.empty:
+            return 0
+        return len(collapse_threads(list(zip(df["id"].tolist(), df["thread_id"].tolist())), log=False)[0])
+
+    chunk_limit = overfetch.chunk_limit(limit)
     try:
-        df = project.query(select_query).fetch()
-        
-        result_indices = df[["id"]].to_dict(orient="records")
-        result_indices = list({v['id']:v for v in result_indices}.values())
-        res = []
-        for i in result_indices:
-            email_query = f"SELECT * FROM {db.name}.emails WHERE id = {i['id']};"
-            email_res = query_email_db(db, email_query)
-            if email_res is not None:
-                res.append(email_res[0])
+        df = fetch_chunks(chunk_limit)
+        # too few emails, or too few once collapsed per thread, both call for a top-up
+        found = distinct_threads(df)
+        if found < limit and len(df) >= chunk_limit and chunk_limit < MAX_CHUNK_FETCH:
+            chunk_limit = overfetch.top_up_limit(limit, len(df), found)
+            df = fetch_chunks(chunk_limit)
+    except Exception as e:
+        if use_local and LOCAL_INDEX_MODE == "fallback":
+            logger.error(f"Knowledge base '{kb.name}' unavailable, answering from local index: {e}")
+            timings["policy"] = "local"
+            return [{"id": i} for i in search_local_index(local_index, query, limit, dt_filter, since=get_cutoffs()[1])]
+        raise
 
-        return res
+    if df.empty:
+        return []
+    # the estimator learns chunks per email; thread collapse is handled by the top-up
+    overfetch.observe(len(df), df["id"].nunique())
+
+    df["score"] = df["relevance"] if rerank_policy == "always" else 1 - df["distance"]
+    if rerank_policy in ("top", "ambiguous"):
+        df = rerank_chunks(project, kb, query, df, rerank_policy, timings, dt_filter)
+
+    ids, timings["collapsed"] = collapse_threads(aggregate_chunk_scores(df))
+    metadata = dict(zip(df["id"].tolist()[::-1], df["metadata"].tolist()[::-1]))
+    return [
+        {"id": i, "subject": metadata[i].get("subject"), "datetime": metadata[i].get("datetime")}
+        for i in ids[:limit]
+    ]
+
+
+def query_email_kb(project: Project, kb: KnowledgeBase, db: Database, query: str, limit: int, dt_filter: str | None = None, local_index: LocalVectorIndex | None = None, rerank_policy: str = "always", timings: dict | None = None) -> List[dict] | None:
+    """
+    Query the email knowledge base.
+
+    Args:
+        project (Project): The MindsDB project instance.
+        kb (KnowledgeBase): The MindsDB knowledge base instance.
+        query (str): The SQL query to execute on the knowledge base.
+        local_index (LocalVectorIndex | None): Optional local copy of the embeddings.
+        rerank_policy (str): One of `RERANK_POLICIES`.
+        timings (dict | None): Optional dict filled with vector and rerank timings.
+    """
+    try:
+        hits = search_email_kb(project, kb, query, limit, dt_filter, local_index, rerank_policy, timings)
+        return hydrate_emails(db, [hit["id"] for hit in hits])
 
     except Exception as e:
         logger.error(f"Failed to query knowledge base '{kb.name}': {e}")
         return None
 
 
+def sync_header_store(store: HeaderStore, db: Database, batch_size: int = 5000) -> int:
+    """
+    Copy headers of emails newer than the store watermark from the database into the header store.
+
+    Args:
+        store (HeaderStore): The local header store.
+        db (Database): The MindsDB database instance.
+        batch_size (int): The number of headers fetched per query.
+
+    Returns:
+        int: The number of headers added.
+    """
+    added = 0
+    while True:
+        rows = query_email_db(db, f"""SELECT id, subject, from_field, datetime
+FROM {db.name}.emails
+WHERE id > {store.watermark}
+ORDER BY id
+LIMIT {batch_size};""")
+        if not rows:
+            break
+        store.add(rows)
+        added += len(rows)
+
+    if added:
+        logger.info(f"Added {added} headers to header store '{store.path}'.")
+    return added
+
+
+def sync_local_index(index: LocalVectorIndex, db: Database, batch_size: int = 64) -> int:
+    """
+    Embed emails newer than the local index watermark and append them to it.
+    Uses the same id watermark as the hourly update jobs, so it can be run
+    repeatedly and only ever embeds new mail.
+
+    Args:
+        index (LocalVectorIndex): The local vector index.
+        db (Database): The MindsDB database instance.
+        batch_size (int): The number of emails embedded per request.
+
+    Returns:
+        int: The number of emails added.
+    """
+    added = 0
+    try:
+        while True:
+            rows = query_email_db(db, f"""SELECT id, subject, from_field, body, datetime
+FROM {db.name}.emails
+WHERE id > {index.watermark}
+ORDER BY id
+LIMIT {batch_size};""")
+            if not rows:
+                break
+            vectors = embed_texts([email_to_text(row) for row in rows])
+            index.add([row["id"] for row in rows], vectors, [row["datetime"] for row in rows])
+            added += len(rows)
+    except Exception as e:
+        logger.error(f"Failed to sync local index '{index.path}': {e}")
+
+    if added:
+        logger.info(f"Added {added} emails to local index '{index.path}'.")
+        if index.count >= APPROX_MIN_ROWS and not index.meta["nlist"]:
+            index.build_ivf()
+    return added
+
+
+def semantic_page_fetcher(project: Project, kb: KnowledgeBase, db: Database, query: str, page_size: int, dt_filter: str | None = None, local_index: LocalVectorIndex | None = None, rerank_policy: str = "always", sender: str | None = None, recipient: str | None = None):
+    """
+    Build a page fetcher for semantic search results.
+
+    The ranked hit list is fetched once and grown geometrically only when a page
+    runs past its end, so paging never re-fetches emails that were already
+    shown. Pages hold the partial rows from the knowledge base metadata; use
+    `hydrate_rows` to fill in the rest. The cursor is the offset into the
+    ranked hit list. Each page comes with the timings of the search run for
+    it, in a dict of its own (empty when the page came from earlier hits).
+
+    Args:
+        project (Project): The MindsDB project instance.
+        kb (KnowledgeBase): The MindsDB knowledge base instance.
+        db (Database): The MindsDB database instance.
+        query (str): The natural language query.
+        page_size (int): The number of emails per page.
+        dt_filter (str | None): Optional date prefix (yyyy-mm-dd) to filter on.
+        local_index (LocalVectorIndex | None): Optional local copy of the embeddings.
+        rerank_policy (str): One of `RERANK_POLICIES`.
+        sender (str | None): Optional sender address or domain to filter on.
+        recipient (str | None): Optional recipient address or domain to filter on.
+    """
+    state = {"hits": [], "window": 0, "complete": False}
+
+    def fetch_page(offset: int | None) -> tuple[List[dict], int | None, dict]:
+        offset = offset or 0
+        timings = {}
+        while offset + page_size > len(state["hits"]) and not state["complete"]:
+            state["window"] = max(state["window"] * 2, page_size * 3)
+            hits = search_email_kb(project, kb, query, state["window"], dt_filter, local_index, rerank_policy, timings, sender, recipient)
+            # a short result list is the whole result set, as is a refetch that adds nothing
+            state["complete"] = len(hits) < state["window"] or len(hits) <= len(state["hits"])
+            # keep the order of hits already handed out stable across refetches
+            seen = {hit["id"] for hit in state["hits"]}
+            state["hits"].extend(hit for hit in hits if hit["id"] not in seen)
+
+        page = state["hits"][offset:offset + page_size]
+        next_offset = offset + page_size
+        if next_offset >= len(state["hits"]) and state["complete"]:
+            next_offset = None
+        return page, next_offset, timings
+
+    return fetch_page
+
+
+def hydrate_rows(db: Database, rows: List[dict], batch_size: int = 5):
+    """
+    Fill partial search rows with the full emails from the database, in place.
+    Rows are hydrated in small batches and the function yields after each one,
+    so callers can re-render as results arrive.
+
+    Args:
+        db (Database): The MindsDB database instance.
+        rows (List[dict]): The partial rows, e.g. a page from `semantic_page_fetcher`.
+        batch_size (int): The number of emails fetched per query.
+    """
+    pending = [row for row in rows if "body" not in row]
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    futures = [
+        _hydrate_executor.submit(hydrate_emails, db, [row["id"] for row in batch])
+        for batch in batches
+    ]
+    for future in as_completed(futures):
+        for email in future.result():
+            for row in pending:
+                if row["id"] == email["id"]:
+                    row.update(email)
+        yield
+
+
+def probe_email_kb(project: Project, kb: KnowledgeBase, reranking: bool = False) -> None:
+    """
+    Run a trivial semantic query so the embedding model (and optionally the
+    reranker) is loaded before the first real query.
+
+    Args:
+        project (Project): The MindsDB project instance.
+        kb (KnowledgeBase): The MindsDB knowledge base instance.
+        reranking (bool): Whether to also exercise the reranking model.
+    """
+    probe_query = f"""SELECT id
+FROM {kb.name}
+WHERE content = 'warm up'
+LIMIT 1
+USING
+    threads = 1,
+    reranking = {str(reranking).lower()};
+"""
+    project.query(probe_query).fetch()
+
+
+def time_kb_search(project: Project, kb: KnowledgeBase, runs: int = 3) -> float:
+    """
+    Return the median latency in ms of a plain top-10 semantic query, without reranking.
+    """
+    probe_query = f"""SELECT id, chunk_id, distance
+FROM {kb.name}
+WHERE content = 'meeting schedule and project update'
+LIMIT 10
+USING
+    threads = 1,
+    reranking = false;
+"""
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        project.query(probe_query).fetch()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return sorted(latencies)[len(latencies) // 2]
+
+
+def get_kb_storage_stats(vs: Database) -> tuple[int, int] | None:
+    """
+    Return the number of chunks and the on-disk size in bytes of the vector storage table.
+    """
+    try:
+        df = vs.query(f"""SELECT * FROM {vs.name} (
+    SELECT count(*) AS chunks, pg_total_relation_size('storage_table') AS bytes FROM storage_table
+);""").fetch()
+        return int(df["chunks"].iloc[0]), int(df["bytes"].iloc[0])
+    except Exception as e:
+        logger.error(f"Failed to get storage stats of '{vs.name}': {e}")
+        return None
+
+
+def _delete_from_kb(project: Project, kb: KnowledgeBase, ids: List[int], batch_size: int = 500) -> None:
+    for i in range(0, len(ids), batch_size):
+        id_list = ", ".join(str(email_id) for email_id in ids[i:i + batch_size])
+        project.query(f"DELETE FROM {kb.name} WHERE id IN ({id_list});").fetch()
+
+
+def compact_email_kb(project: Project, kb: KnowledgeBase, db: Database, vs: Database, thread_index: ThreadIndex, retention: RetentionState, local_index: LocalVectorIndex | None = None, granularity: str = COMPACT_GRANULARITY) -> dict:
+    """
+    Apply the retention tiers to the knowledge base and the local index.
+
+    Emails past the retention cutoff are deleted from the knowledge base and
+    the local index (they stay in the email database), and emails past the
+    chunk tier are replaced by one compact embedding per message, or per
+    thread with `thread` granularity. Only mail that aged into a tier since
+    the last run is processed, plus old mail that ingest or backfill
+    compacted per message since (`recompact_from`). Compaction works through
+    it in `COMPACT_WINDOW_DAYS` windows, so a thread spanning several windows
+    keeps one document per window.
+
+    Args:
+        project (Project): The MindsDB project instance.
+        kb (KnowledgeBase): The MindsDB knowledge base instance.
+        db (Database): The MindsDB database instance.
+        vs (Database): The vector storage backing the knowledge base.
+        thread_index (ThreadIndex): The thread index used to group the emails.
+        retention (RetentionState): The persisted progress of earlier compactions.
+        local_index (LocalVectorIndex | None): Optional local vector index to drop old mail from.
+        granularity (str): One of `COMPACT_GRANULARITIES`.
+
+    Returns:
+        dict: The report, see `format_compaction`.
+    """
+    compact_before, drop_before = get_cutoffs()
+    report = {"compacted": 0, "documents": 0, "dropped": 0}
+    stats_before = get_kb_storage_stats(vs)
+    report["latency_before_ms"] = time_kb_search(project, kb)
+
+    dropped_before = retention.state["dropped_before"]
+    if drop_before and (dropped_before or "") < drop_before:
+        where = f"datetime < '{drop_before}'" + (f" AND datetime >= '{dropped_before}'" if dropped_before else "")
+        rows = query_email_db(db, f"SELECT id FROM {db.name}.emails WHERE {where};") or []
+        _delete_from_kb(project, kb, [row["id"] for row in rows])
+        thread_index.unmark_indexed([row["id"] for row in rows])
+        thread_index.save()
+        report["dropped"] = len(rows)
+        retention.state["dropped_before"] = drop_before
+        retention.save()
+        logger.info(f"Dropped {len(rows)} emails sent before {drop_before} from knowledge base '{kb.name}'.")
+    if drop_before and local_index is not None:
+        report["dropped_local"] = local_index.drop_before(drop_before)
+
+    since = max(filter(None, [retention.state["compacted_before"], drop_before]), default=None)
+    if since is None:
+        oldest = get_oldest_email_datetime(db)
+        since = oldest[:10] if oldest else compact_before
+    recompact_from = retention.state["recompact_from"]
+    if recompact_from and granularity == "thread":
+        since = min(since, max(recompact_from, drop_before or recompact_from))
+    while since < compact_before:
+        until = min((date.fromisoformat(since) + timedelta(days=COMPACT_WINDOW_DAYS)).isoformat(), compact_before)
+        rows = query_email_db(db, f"""SELECT *
+FROM {db.name}.emails
+WHERE datetime >= '{since}' AND datetime < '{until}'
+ORDER BY id;""") or []
+        if rows:
+            ids = [row["id"] for row in rows]
+            groups = {}
+            for row in rows:
+                thread_id = thread_index.lookup(row)
+                key = thread_id if granularity == "thread" else row["id"]
+                groups.setdefault(key, (thread_id, []))[1].append(row)
+
+            records = []
+            for thread_id, members in groups.values():
+                members.sort(key=lambda row: str(row.get("datetime")), reverse=True)
+                latest = members[0]
+                body = compact_text(latest.get("subject"), [strip_quoted(row.get("body")) for row in members])
+                records.append(_kb_record(latest, body, thread_id))
+
+            _delete_from_kb(project, kb, ids)
+            kb.insert(DataFrame(records))
+            report["compacted"] += len(rows)
+            report["documents"] += len(records)
+
+        retention.state["compacted_before"] = max(until, retention.state["compacted_before"] or until)
+        retention.save()
+        since = until
+
+    # mail marked while this run was going on is left for the next one
+    if recompact_from and retention.state["recompact_from"] == recompact_from:
+        retention.state["recompact_from"] = None
+        retention.save()
+
+    if report["compacted"]:
+        logger.info(f"Compacted {report['compacted']} emails into {report['documents']} documents in knowledge base '{kb.name}'.")
+
+    stats_after = get_kb_storage_stats(vs)
+    if stats_before and stats_after:
+        (chunks_before, bytes_before), (chunks_after, _) = stats_before, stats_after
+        report["chunks_before"], report["chunks_after"] = chunks_before, chunks_after
+        # deleted rows are only reused by Postgres after (auto)vacuum, so estimate from the average chunk size
+        report["reclaimed_bytes"] = max(chunks_before - chunks_after, 0) * bytes_before // max(chunks_before, 1)
+    report["latency_after_ms"] = time_kb_search(project, kb)
+    return report
+
+
 def create_kb_index(project: Project, kb: KnowledgeBase) -> None:
     """
     Create an index for the email knowledge base.
@@ -379,28 +1180,18 @@ def create_kb_index(project: Project, kb: KnowledgeBase) -> None:
         logger.error(f"Failed to create index for knowledge base '{kb.name}': {e}")
 
 
-def create_jobs(project: Project, kb: KnowledgeBase, db: Database, engine: Database) -> None:
+def create_jobs(project: Project, db: Database, engine: Database) -> None:
     """
-    Create an hourly job to update the email knowledge base and database.
+    Create an hourly job to update the email database.
+    The knowledge base is updated from the database by `ingest_emails_to_kb`,
+    which needs thread information that can't be computed in SQL, so a
+    leftover `kb_update_job` from older versions is dropped.
 
     Args:
         project (Project): The MindsDB project instance.
-        kb_update_query (str): The SQL query to update the knowledge base.
-        db_update_query (str): The SQL query to update the database.
+        db (Database): The MindsDB database instance.
+        engine (Database): The MindsDB email engine instance.
     """
-    kb_insert_query = f"""INSERT INTO {kb.name}
-SELECT *
-FROM {engine.name}.emails
-WHERE id > (
-    SELECT id FROM {db.name}.emails ORDER BY id DESC LIMIT 1
-)
-USING
-    kb_no_upsert = true,
-    batch_size = 50,
-    threads = 1,
-    track_column = id;
-"""
-    
     db_insert_query = f"""INSERT INTO {db.name}.emails
 SELECT *
 FROM {engine.name}.emails
@@ -412,15 +1203,14 @@ WHERE id > (
     jobs_list = project.jobs.list()
     job_names = [job.name for job in jobs_list]
 
-    if 'kb_update_job' in job_names and 'db_update_job' in job_names:
+    if 'kb_update_job' in job_names:
+        project.drop_job('kb_update_job')
+        logger.info("Dropped 'kb_update_job', the knowledge base is now updated by grepmail.")
+
+    if 'db_update_job' in job_names:
         logger.info("Jobs already exist. Skipping creation.")
         return None
-    
-    _ = project.create_job(
-        name='kb_update_job',
-        query_str=kb_insert_query,
-        repeat_str='1 hour',
-    )
+
     _ = project.create_job(
         name='db_update_job',
         query_str=db_insert_query,
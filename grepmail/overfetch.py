@@ -0,0 +1,82 @@
+import math
+import os
+import threading
+
+import pandas as pd
+from pandas import DataFrame
+
+# How chunk scores are combined into an email score: `max` ranks an email by
+# its best chunk, `sum` favours emails that match in several chunks.
+SCORE_AGGREGATION = os.getenv("GREPMAIL_SCORE_AGGREGATION", "max").lower()
+
+# Upper bound on the chunks fetched by a single knowledge base query.
+MAX_CHUNK_FETCH = int(os.getenv("GREPMAIL_MAX_CHUNK_FETCH", 500))
+
+
+class OverFetchEstimator:
+    """
+    Learns how many chunks the knowledge base returns per distinct email, so a
+    search can ask for enough chunks to fill the requested number of emails in
+    one round trip.
+
+    The ratio is tracked as an exponential moving average of the observed
+    chunks-per-email of each search.
+
+    Args:
+        initial (float): The multiplier used before anything has been observed.
+        alpha (float): The weight of the latest observation.
+        max_multiplier (float): The upper bound of the multiplier.
+    """
+
+    def __init__(self, initial: float = 2.0, alpha: float = 0.3, max_multiplier: float = 20.0):
+        self.multiplier = initial
+        self.alpha = alpha
+        self.max_multiplier = max_multiplier
+        self._lock = threading.Lock()
+
+    def chunk_limit(self, emails: int) -> int:
+        """
+        The number of chunks to fetch for `emails` distinct emails.
+        """
+        return min(MAX_CHUNK_FETCH, math.ceil(emails * self.multiplier))
+
+    def top_up_limit(self, emails: int, chunks: int, found: int) -> int:
+        """
+        The number of chunks for a single top-up fetch after `chunks` chunks only yielded `found` results
+        (emails left after collapsing threads). The ratio of this search is used with
+        50% headroom, since it is a better predictor than the running average and it
+        also covers hits lost to thread collapse, which `observe` leaves out.
+        """
+        ratio = chunks / max(found, 1)
+        return min(MAX_CHUNK_FETCH, max(chunks + 1, math.ceil(emails * ratio * 1.5)))
+
+    def observe(self, chunks: int, emails: int) -> None:
+        """
+        Record the chunks-per-email ratio of a search.
+        """
+        if not chunks or not emails:
+            return
+        with self._lock:
+            ratio = min(self.max_multiplier, max(1.0, chunks / emails))
+            self.multiplier = (1 - self.alpha) * self.multiplier + self.alpha * ratio
+
+
+overfetch = OverFetchEstimator()
+
+
+def aggregate_chunk_scores(df: DataFrame, how: str = SCORE_AGGREGATION) -> list[tuple[int, int | None]]:
+    """
+    Group chunk hits by email and rank the emails by their aggregated score.
+
+    Args:
+        df (DataFrame): The chunk hits with `id`, `score` and `thread_id` columns.
+        how (str): `max` or `sum`.
+
+    Returns:
+        list: (email id, thread id) pairs, best email first.
+    """
+    if df.empty:
+        return []
+    grouped = df.groupby("id", sort=False).agg(score=("score", "sum" if how == "sum" else "max"), thread_id=("thread_id", "first"))
+    grouped = grouped.sort_values("score", ascending=False, kind="stable")
+    return [(int(email_id), None if pd.isna(thread_id) else int(thread_id)) for email_id, thread_id in zip(grouped.index, grouped["thread_id"])]
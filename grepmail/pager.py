@@ -0,0 +1,110 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, List, Tuple
+
+from grepmail.logger import logger
+
+# A page fetcher takes the cursor of the page to load and returns its rows
+# together with the cursor of the following page (None once exhausted) and,
+# optionally, the timings of the queries run for the page.
+PageFetcher = Callable[[Any], Tuple[List[dict], Any] | Tuple[List[dict], Any, dict]]
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="grepmail-prefetch")
+
+
+class Pager:
+    """
+    Keyset pager over a result set with background prefetch of the next page.
+
+    Pages that have already been shown are kept in memory, so `/prev` never
+    hits the database again and `/next` never rescans earlier results. Each
+    page keeps its own timings, so a prefetch never overwrites the timings
+    of the page on screen.
+
+    Args:
+        fetch_page (PageFetcher): Callable loading the page for a cursor.
+        title (str): Title used when rendering the pages of this pager.
+        with_snippet (bool): Whether rows carry a body snippet worth rendering.
+        first_cursor (Any): Cursor of the first page.
+    """
+
+    def __init__(self, fetch_page: PageFetcher, title: str, with_snippet: bool = False, first_cursor: Any = None):
+        self.fetch_page = fetch_page
+        self.title = title
+        self.with_snippet = with_snippet
+        self.pages: List[List[dict]] = []
+        self.timings: List[dict] = []
+        self.index = -1
+        self._next_cursor = first_cursor
+        self._exhausted = False
+        self._prefetch: Future | None = None
+
+    def _load(self, cursor: Any) -> Tuple[List[dict], Any, dict]:
+        try:
+            rows, cursor, *timings = self.fetch_page(cursor)
+            return rows, cursor, timings[0] if timings else {}
+        except Exception as e:
+            logger.error(f"Failed to fetch page for '{self.title}': {e}")
+            return [], None, {}
+
+    def _schedule_prefetch(self) -> None:
+        if self._exhausted or self._prefetch is not None:
+            return
+        self._prefetch = _executor.submit(self._load, self._next_cursor)
+
+    @property
+    def page_number(self) -> int:
+        return self.index + 1
+
+    @property
+    def page_timings(self) -> dict:
+        """
+        The timings of the current page (empty when it needed no new query).
+        """
+        return self.timings[self.index] if self.index >= 0 else {}
+
+    @property
+    def has_next(self) -> bool:
+        return self.index + 1 < len(self.pages) or not self._exhausted
+
+    @property
+    def has_prev(self) -> bool:
+        return self.index > 0
+
+    def next(self) -> List[dict] | None:
+        """
+        Move to the next page, waiting for the prefetch if it is still running.
+        Returns None when there are no more results.
+        """
+        if self.index + 1 < len(self.pages):
+            self.index += 1
+            return self.pages[self.index]
+
+        if self._exhausted:
+            return None
+
+        if self._prefetch is None:
+            rows, cursor, timings = self._load(self._next_cursor)
+        else:
+            rows, cursor, timings = self._prefetch.result()
+            self._prefetch = None
+
+        self._next_cursor = cursor
+        self._exhausted = cursor is None
+        if not rows:
+            self._exhausted = True
+            return None
+
+        self.pages.append(rows)
+        self.timings.append(timings)
+        self.index += 1
+        self._schedule_prefetch()
+        return rows
+
+    def prev(self) -> List[dict] | None:
+        """
+        Move back to the previous page. Returns None on the first page.
+        """
+        if not self.has_prev:
+            return None
+        self.index -= 1
+        return self.pages[self.index]
@@ -0,0 +1,122 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Iterable
+
+from grepmail.logger import logger
+
+# always: let the knowledge base rerank every query with Gemini,
+# off: vector similarity only,
+# top: rerank only the best RERANK_TOP_N chunks,
+# ambiguous: like top, but only when the vector scores don't separate the results.
+RERANK_POLICIES = ("always", "off", "top", "ambiguous")
+
+RERANK_TOP_N = int(os.getenv("GREPMAIL_RERANK_TOP_N", 10))
+RERANK_AMBIGUITY_MARGIN = float(os.getenv("GREPMAIL_RERANK_AMBIGUITY_MARGIN", 0.05))
+RERANK_CACHE_SIZE = int(os.getenv("GREPMAIL_RERANK_CACHE_SIZE", 10_000))
+
+
+def get_rerank_policy(email: str) -> str:
+    """
+    Get the rerank policy for an account.
+
+    `GREPMAIL_RERANK_POLICY_<USER>` (the upper-cased local part of the address)
+    overrides the global `GREPMAIL_RERANK_POLICY`, which defaults to `ambiguous`.
+
+    Args:
+        email (str): The email address of the account.
+    """
+    account_key = f'GREPMAIL_RERANK_POLICY_{email.split("@")[0].upper()}'
+    policy = os.getenv(account_key) or os.getenv("GREPMAIL_RERANK_POLICY", "ambiguous")
+    policy = policy.lower()
+    if policy not in RERANK_POLICIES:
+        logger.error(f"Unknown rerank policy '{policy}', falling back to 'ambiguous'.")
+        return "ambiguous"
+    return policy
+
+
+def split_rerank_flag(query: str) -> tuple[str, str | None]:
+    """
+    Strip a per-query `--rerank=<policy>` flag from a query.
+
+    Returns:
+        tuple: The query without the flag and the requested policy (None if absent or invalid).
+    """
+    policy = None
+    words = []
+    for word in query.split(" "):
+        if word.lower().startswith("--rerank="):
+            value = word.split("=", 1)[1].lower()
+            policy = value if value in RERANK_POLICIES else None
+        else:
+            words.append(word)
+    return " ".join(words).strip(), policy
+
+
+def is_ambiguous(scores: Iterable[float], margin: float = RERANK_AMBIGUITY_MARGIN) -> bool:
+    """
+    Decide whether vector scores are too close together to trust their order.
+    The results are ambiguous when the best score doesn't beat the last of the
+    top-N scores by more than `margin`.
+    """
+    scores = sorted(scores, reverse=True)
+    if len(scores) < 2:
+        return False
+    return scores[0] - scores[-1] <= margin
+
+
+class RerankCache:
+    """
+    Bounded LRU cache of rerank scores keyed by (query, chunk id).
+
+    Args:
+        max_size (int): The maximum number of cached scores.
+    """
+
+    def __init__(self, max_size: int = RERANK_CACHE_SIZE):
+        self.max_size = max_size
+        self._scores: OrderedDict[tuple[str, str], float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, query: str, chunk_id: str) -> float | None:
+        with self._lock:
+            key = (query.strip().lower(), str(chunk_id))
+            if key not in self._scores:
+                return None
+            self._scores.move_to_end(key)
+            return self._scores[key]
+
+    def set(self, query: str, chunk_id: str, score: float) -> None:
+        with self._lock:
+            key = (query.strip().lower(), str(chunk_id))
+            self._scores[key] = score
+            self._scores.move_to_end(key)
+            while len(self._scores) > self.max_size:
+                self._scores.popitem(last=False)
+
+
+rerank_cache = RerankCache()
+
+
+def format_timings(timings: dict) -> str:
+    """
+    Format search timings for display, keeping vector search and rerank time apart
+    where the policy allows timing them separately.
+    """
+    parts = []
+    if "vector_ms" in timings:
+        # with `always` the reranker runs inside the vector query and can't be timed apart
+        label = "vector + rerank" if timings.get("policy") == "always" else "vector"
+        parts.append(f"{label} {timings['vector_ms']:.0f} ms")
+    if timings.get("reranked"):
+        parts.append(
+            f"rerank {timings.get('rerank_ms', 0):.0f} ms "
+            f"({timings['reranked']} chunks, {timings.get('rerank_cache_hits', 0)} cached)"
+        )
+    if "hydrate_ms" in timings:
+        parts.append(f"hydrate {timings['hydrate_ms']:.0f} ms")
+    if timings.get("collapsed"):
+        parts.append(f"{timings['collapsed']} same-thread hits collapsed")
+    if "policy" in timings:
+        parts.append(f"policy {timings['policy']}")
+    return " · ".join(parts)
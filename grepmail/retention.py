@@ -0,0 +1,123 @@
+import json
+import os
+import threading
+from datetime import date, timedelta
+
+from grepmail.vector_index import GREPMAIL_DATA_DIR
+
+# Mail younger than this keeps chunk-level embeddings; older mail is compacted.
+CHUNK_TIER_DAYS = int(os.getenv("GREPMAIL_CHUNK_TIER_DAYS", 365))
+# Mail older than this is dropped from the knowledge base (0 keeps it forever).
+# It stays in the email database for /ls, /grep and /fetch.
+RETENTION_DAYS = int(os.getenv("GREPMAIL_RETENTION_DAYS", 0))
+COMPACT_GRANULARITIES = ("message", "thread")
+COMPACT_GRANULARITY = os.getenv("GREPMAIL_COMPACT_GRANULARITY", "message").lower()
+# Compacted documents are cut to this many characters so they embed as a single chunk.
+COMPACT_CHARS = int(os.getenv("GREPMAIL_COMPACT_CHARS", 800))
+COMPACT_WINDOW_DAYS = 30
+
+if COMPACT_GRANULARITY not in COMPACT_GRANULARITIES:
+    COMPACT_GRANULARITY = "message"
+
+
+def get_cutoffs(today: date | None = None) -> tuple[str, str | None]:
+    """
+    Return the (compact before, drop before) days (yyyy-mm-dd) of the retention tiers.
+    The drop cutoff is None when mail is kept forever.
+    """
+    today = today or date.today()
+    compact_before = (today - timedelta(days=CHUNK_TIER_DAYS)).isoformat()
+    drop_before = (today - timedelta(days=RETENTION_DAYS)).isoformat() if RETENTION_DAYS else None
+    if drop_before and drop_before > compact_before:
+        compact_before = drop_before
+    return compact_before, drop_before
+
+
+def get_tier(sent_at, cutoffs: tuple[str, str | None]) -> str:
+    """
+    Return the retention tier (`chunks`, `compact` or `drop`) of an email sent at `sent_at`.
+    """
+    day = str(sent_at)[:10]
+    compact_before, drop_before = cutoffs
+    if drop_before and day < drop_before:
+        return "drop"
+    if day < compact_before:
+        return "compact"
+    return "chunks"
+
+
+def compact_text(subject: str | None, bodies: list[str]) -> str:
+    """
+    Build the single document embedded for a compacted message or thread:
+    the subject followed by the start of each body, newest first, cut to `COMPACT_CHARS`.
+    """
+    text = (subject or "").strip()
+    for body in bodies:
+        if len(text) >= COMPACT_CHARS:
+            break
+        text += "\n\n" + " ".join(body.split())
+    return text[:COMPACT_CHARS]
+
+
+class RetentionState:
+    """
+    Remembers up to which day mail has been compacted and dropped, so each
+    compaction only processes mail that aged into a tier since the last run.
+    Old mail ingested later (e.g. by the backfill) is stored compacted per
+    message; with `thread` granularity its earliest day is remembered in
+    `recompact_from` so the next compaction merges it into its threads.
+
+    Args:
+        path (str): The JSON file the state is persisted to.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.state = {"compacted_before": None, "dropped_before": None, "recompact_from": None}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.state.update(json.load(f))
+
+    def mark_for_recompaction(self, day: str) -> None:
+        """
+        Remember that mail from `day` on was compacted per message outside of `/compact`.
+        """
+        with self._lock:
+            if self.state["recompact_from"] is None or day < self.state["recompact_from"]:
+                self.state["recompact_from"] = day
+        self.save()
+
+    def save(self) -> None:
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(self.state, f)
+            os.replace(tmp, self.path)
+
+
+def get_retention_state_path(email: str) -> str:
+    """
+    Generate the retention state file path based on the email address.
+    """
+    return os.path.join(GREPMAIL_DATA_DIR, f'retention_{email.split("@")[0]}.json')
+
+
+def format_compaction(report: dict) -> str:
+    """
+    Format a compaction report as a short summary line.
+    """
+    parts = [
+        f"compacted {report.get('compacted', 0)} emails into {report.get('documents', 0)} documents",
+        f"dropped {report.get('dropped', 0)} emails",
+    ]
+    if report.get("dropped_local"):
+        parts.append(f"dropped {report['dropped_local']} local vectors")
+    if "chunks_before" in report:
+        parts.append(f"chunks {report['chunks_before']} → {report['chunks_after']}")
+    if "reclaimed_bytes" in report:
+        parts.append(f"~{report['reclaimed_bytes'] / 1e6:.1f} MB reclaimable")
+    if "latency_before_ms" in report:
+        parts.append(f"search {report['latency_before_ms']:.0f} → {report['latency_after_ms']:.0f} ms")
+    return " · ".join(parts)
@@ -0,0 +1,317 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from email.utils import getaddresses
+
+from grepmail.logger import logger
+from grepmail.vector_index import GREPMAIL_DATA_DIR
+
+# Replies older than this are not attached to a thread by subject alone.
+THREAD_WINDOW_DAYS = int(os.getenv("GREPMAIL_THREAD_WINDOW_DAYS", 90))
+# Threads kept per normalised subject, the least recently active are forgotten first.
+MAX_THREADS_PER_SUBJECT = int(os.getenv("GREPMAIL_MAX_THREADS_PER_SUBJECT", 20))
+
+_SUBJECT_PREFIX = re.compile(r"^\s*((re|fw|fwd|aw|sv|wg)(\[\d+\])?\s*:\s*|\[[^\]]*\]\s*)+", re.IGNORECASE)
+
+# Lines that introduce the quoted history of a reply or forward.
+_QUOTE_HEADERS = [
+    re.compile(r"^\s*On .+wrote:\s*$", re.IGNORECASE),
+    re.compile(r"^\s*-{2,}\s*(Original|Forwarded) Message\s*-{2,}", re.IGNORECASE),
+    re.compile(r"^\s*From:\s.+$", re.IGNORECASE),
+    re.compile(r"^\s*_{10,}\s*$"),
+]
+
+_MIN_NEW_CONTENT = 20
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('watermark', 0);
+CREATE TABLE IF NOT EXISTS threads (thread_id INTEGER PRIMARY KEY, subject TEXT NOT NULL, last TEXT);
+CREATE INDEX IF NOT EXISTS threads_subject ON threads (subject, last);
+CREATE TABLE IF NOT EXISTS participants (thread_id INTEGER NOT NULL, address TEXT NOT NULL, PRIMARY KEY (thread_id, address));
+CREATE INDEX IF NOT EXISTS participants_address ON participants (address);
+CREATE TABLE IF NOT EXISTS message_ids (message_id TEXT PRIMARY KEY, thread_id INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS indexed (id INTEGER PRIMARY KEY);
+"""
+
+
+def normalize_subject(subject: str | None) -> str:
+    """
+    Strip reply/forward markers and list tags from a subject and normalise whitespace.
+    """
+    subject = _SUBJECT_PREFIX.sub("", subject or "")
+    return " ".join(subject.lower().split())
+
+
+def get_addresses(*fields: str | None) -> set[str]:
+    """
+    Extract the lower-cased email addresses from address header values.
+    """
+    return {addr.lower() for _, addr in getaddresses([f for f in fields if f]) if addr}
+
+
+def strip_quoted(body: str | None) -> str:
+    """
+    Remove the quoted history of a reply, keeping only the new content.
+    Falls back to the full body when almost nothing new is left (e.g. a bare forward).
+    """
+    body = body or ""
+    kept = []
+    for line in body.splitlines():
+        if any(header.match(line) for header in _QUOTE_HEADERS) and kept:
+            break
+        if line.lstrip().startswith(">"):
+            continue
+        kept.append(line)
+
+    new_content = "\n".join(kept).strip()
+    if len(new_content) < _MIN_NEW_CONTENT:
+        return body.strip()
+    return new_content
+
+
+def _parse_datetime(value) -> datetime | None:
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value).split(".")[0])
+    except ValueError:
+        return None
+
+
+class ThreadIndex:
+    """
+    Assigns emails to conversation threads and persists the assignment.
+
+    Threads are matched on Message-ID/In-Reply-To when the source provides them
+    (`message_id`, `in_reply_to`, `references` keys), and otherwise on the
+    normalised subject of a reply or forward plus at least one shared
+    participant other than the account owner, within `THREAD_WINDOW_DAYS`
+    either way. The owner is on nearly every email, so sharing them says
+    nothing. A thread id is the id of the first email of the thread.
+
+    The index is kept in SQLite, so each batch only writes the threads it
+    touched. It also records which emails are stored in the knowledge base,
+    for reporting how much of the mailbox is searchable. Only the `MAX_THREADS_PER_SUBJECT` most recently active threads
+    are kept per subject, so recurring subjects (newsletters, reports) stay
+    cheap to match.
+
+    Args:
+        path (str): The SQLite file the index is persisted to.
+        owner (str | None): The account's own address, ignored when matching participants.
+    """
+
+    def __init__(self, path: str, owner: str | None = None):
+        self.path = path
+        self.owner = (owner or "").lower()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        created = not os.path.exists(path)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._watermark = int(self._conn.execute("SELECT value FROM meta WHERE key = 'watermark';").fetchone()[0])
+        self._indexed = self._conn.execute("SELECT COUNT(*) FROM indexed;").fetchone()[0]
+        legacy_path = f"{os.path.splitext(path)[0]}.json"
+        if created and os.path.exists(legacy_path):
+            self._import_json(legacy_path)
+
+    @property
+    def watermark(self) -> int:
+        return self._watermark
+
+    @property
+    def indexed(self) -> int:
+        """
+        The number of emails stored in the knowledge base.
+        """
+        return self._indexed
+
+    def mark_indexed(self, ids: list[int]) -> None:
+        """
+        Record that `ids` are stored in the knowledge base. Persisted by the next `save()`.
+        """
+        with self._lock:
+            changes = self._conn.total_changes
+            self._conn.executemany("INSERT OR IGNORE INTO indexed (id) VALUES (?);", [(int(i),) for i in ids])
+            self._indexed += self._conn.total_changes - changes
+
+    def unmark_indexed(self, ids: list[int]) -> None:
+        """
+        Record that `ids` were deleted from the knowledge base. Persisted by the next `save()`.
+        """
+        with self._lock:
+            changes = self._conn.total_changes
+            self._conn.executemany("DELETE FROM indexed WHERE id = ?;", [(int(i),) for i in ids])
+            self._indexed -= self._conn.total_changes - changes
+
+    def _import_json(self, legacy_path: str) -> None:
+        with open(legacy_path) as f:
+            state = json.load(f)
+        with self._lock:
+            for subject_key, candidates in state.get("subjects", {}).items():
+                for candidate in candidates:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO threads (thread_id, subject, last) VALUES (?, ?, ?);",
+                        (candidate["thread_id"], subject_key, candidate["last"]),
+                    )
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO participants (thread_id, address) VALUES (?, ?);",
+                        [(candidate["thread_id"], address) for address in candidate["participants"]],
+                    )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO message_ids (message_id, thread_id) VALUES (?, ?);",
+                list(state.get("message_ids", {}).items()),
+            )
+            self._watermark = int(state.get("watermark", 0))
+        self.save()
+        logger.info(f"Imported thread index '{legacy_path}' into '{self.path}'.")
+
+    def reset(self) -> None:
+        """
+        Forget all threads and the watermark, e.g. when the knowledge base is rebuilt.
+        """
+        with self._lock:
+            self._conn.executescript(
+                "DELETE FROM threads; DELETE FROM participants; DELETE FROM message_ids; DELETE FROM indexed;"
+            )
+            self._watermark = self._indexed = 0
+        self.save()
+
+    def save(self) -> None:
+        """
+        Persist the watermark and the threads assigned since the last save.
+        """
+        with self._lock:
+            self._conn.execute("UPDATE meta SET value = ? WHERE key = 'watermark';", (self._watermark,))
+            self._conn.commit()
+
+    def _find(self, email: dict) -> int | None:
+        """
+        Return the thread an email belongs to, or None when it starts a new one.
+        """
+        parents = [p for p in (email.get("references") or "").split() + [email.get("in_reply_to")] if p]
+        for parent in parents:
+            row = self._conn.execute("SELECT thread_id FROM message_ids WHERE message_id = ?;", (parent,)).fetchone()
+            if row:
+                return row[0]
+
+        # the email started a thread when it was assigned before
+        if self._conn.execute("SELECT 1 FROM threads WHERE thread_id = ?;", (int(email["id"]),)).fetchone():
+            return int(email["id"])
+
+        subject_key = normalize_subject(email.get("subject"))
+        correspondents = get_addresses(email.get("from_field"), email.get("to_field")) - {self.owner}
+        if not subject_key or not correspondents or not _SUBJECT_PREFIX.match(email.get("subject") or ""):
+            return None
+        placeholders = ", ".join("?" * len(correspondents))
+        candidates = self._conn.execute(
+            f"""SELECT DISTINCT t.thread_id, t.last FROM threads t JOIN participants p ON p.thread_id = t.thread_id
+WHERE t.subject = ? AND p.address IN ({placeholders})
+ORDER BY t.thread_id DESC;""",
+            (subject_key, *correspondents),
+        ).fetchall()
+        sent_at = _parse_datetime(email.get("datetime"))
+        for thread_id, last in candidates:
+            last = _parse_datetime(last)
+            # backfilled mail is older than the thread it is compared with
+            if sent_at is None or last is None or abs(sent_at - last) <= timedelta(days=THREAD_WINDOW_DAYS):
+                return thread_id
+        return None
+
+    def lookup(self, email: dict) -> int:
+        """
+        Return the thread id of an already assigned email without changing the index.
+        """
+        with self._lock:
+            thread_id = self._find(email)
+            return thread_id if thread_id is not None else int(email["id"])
+
+    def assign(self, email: dict) -> int:
+        """
+        Assign an email to a thread, creating a new thread when nothing matches.
+        The assignment is persisted by the next `save()`.
+
+        Args:
+            email (dict): The email row.
+
+        Returns:
+            int: The thread id.
+        """
+        with self._lock:
+            thread_id = self._find(email)
+            subject_key = normalize_subject(email.get("subject"))
+            if thread_id is None:
+                thread_id = int(email["id"])
+                if subject_key:
+                    self._conn.execute(
+                        "INSERT OR IGNORE INTO threads (thread_id, subject, last) VALUES (?, ?, ?);",
+                        (thread_id, subject_key, str(email.get("datetime"))),
+                    )
+                    self._evict(subject_key)
+
+            row = self._conn.execute("SELECT last FROM threads WHERE thread_id = ?;", (thread_id,)).fetchone()
+            if row is not None:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO participants (thread_id, address) VALUES (?, ?);",
+                    [(thread_id, address) for address in get_addresses(email.get("from_field"), email.get("to_field"))],
+                )
+                last, sent_at = _parse_datetime(row[0]), _parse_datetime(email.get("datetime"))
+                if last is None or sent_at is None or sent_at > last:
+                    self._conn.execute(
+                        "UPDATE threads SET last = ? WHERE thread_id = ?;", (str(email.get("datetime")), thread_id)
+                    )
+
+            if email.get("message_id"):
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO message_ids (message_id, thread_id) VALUES (?, ?);",
+                    (email["message_id"], thread_id),
+                )
+            return thread_id
+
+    def _evict(self, subject_key: str) -> None:
+        stale = self._conn.execute(
+            "SELECT thread_id FROM threads WHERE subject = ? ORDER BY last DESC, thread_id DESC LIMIT -1 OFFSET ?;",
+            (subject_key, MAX_THREADS_PER_SUBJECT),
+        ).fetchall()
+        if stale:
+            self._conn.executemany("DELETE FROM threads WHERE thread_id = ?;", stale)
+            self._conn.executemany("DELETE FROM participants WHERE thread_id = ?;", stale)
+
+    def advance(self, ids: list[int]) -> None:
+        """
+        Move the watermark past `ids`, once the emails are stored in the knowledge base.
+        """
+        if ids:
+            with self._lock:
+                self._watermark = max(self._watermark, max(int(i) for i in ids))
+
+
+def get_thread_index_path(email: str) -> str:
+    """
+    Generate the thread index file path based on the email address.
+    """
+    return os.path.join(GREPMAIL_DATA_DIR, f'threads_{email.split("@")[0]}.db')
+
+
+def collapse_threads(hits: list[tuple[int, int | None]], log: bool = True) -> tuple[list[int], int]:
+    """
+    Collapse ranked (email id, thread id) hits to the best hit per thread.
+
+    Returns:
+        tuple: The distinct email ids, best first, and the number of hits collapsed away.
+    """
+    seen_threads, seen_ids, ids = set(), set(), []
+    for email_id, thread_id in hits:
+        if email_id in seen_ids or (thread_id is not None and thread_id in seen_threads):
+            continue
+        seen_ids.add(email_id)
+        if thread_id is not None:
+            seen_threads.add(thread_id)
+        ids.append(email_id)
+    collapsed = len({email_id for email_id, _ in hits}) - len(ids)
+    if collapsed and log:
+        logger.info(f"Collapsed {collapsed} hits from already shown threads.")
+    return ids, collapsed
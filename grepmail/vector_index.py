@@ -0,0 +1,318 @@
+import json
+import os
+import threading
+import urllib.request
+from datetime import datetime
+from typing import List
+
+import numpy as np
+
+from grepmail.logger import logger
+
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "nomic-embed-text")
+GREPMAIL_DATA_DIR = os.path.expanduser(os.getenv("GREPMAIL_DATA_DIR", "~/.grepmail"))
+
+# off: never use the local index, fallback: use it when the knowledge base
+# query fails, prefer: answer from it whenever it has data.
+LOCAL_INDEX_MODE = os.getenv("GREPMAIL_LOCAL_INDEX", "off").lower()
+
+# Mailboxes with at least this many vectors are searched through the IVF
+# index (when one has been built) instead of an exact scan.
+APPROX_MIN_ROWS = int(os.getenv("GREPMAIL_APPROX_MIN_ROWS", 200_000))
+
+_EPOCH = datetime(1970, 1, 1)
+_INITIAL_CAPACITY = 1024
+_EMBED_CHARS = 4000
+
+
+def embed_texts(texts: List[str]) -> np.ndarray:
+    """
+    Embed texts with the local Ollama embedding model used by the knowledge base.
+
+    Args:
+        texts (List[str]): The texts to embed.
+
+    Returns:
+        np.ndarray: A (len(texts), dim) float32 matrix.
+    """
+    payload = json.dumps({"model": EMBEDDING_MODEL, "input": texts}).encode()
+    request = urllib.request.Request(
+        f"{OLLAMA_URL}/api/embed", data=payload, headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=60) as response:
+        embeddings = json.loads(response.read())["embeddings"]
+    return np.asarray(embeddings, dtype=np.float32)
+
+
+def email_to_text(email: dict) -> str:
+    """
+    Build the text that is embedded for an email, mirroring the knowledge base content columns.
+    """
+    parts = [email.get("subject") or "", email.get("from_field") or "", email.get("body") or ""]
+    return "\n".join(parts)[:_EMBED_CHARS]
+
+
+def _to_day(value) -> int:
+    """
+    Convert an email datetime to days since the epoch (-1 when unknown).
+    """
+    if not value:
+        return -1
+    try:
+        dt = value if isinstance(value, datetime) else datetime.fromisoformat(str(value).split(".")[0])
+    except ValueError:
+        return -1
+    # naive arithmetic, like `header_store.to_timestamp`, keeps the calendar day whatever the local timezone
+    return (dt.replace(tzinfo=None) - _EPOCH).days
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class LocalVectorIndex:
+    """
+    Local copy of the email embeddings kept as memory-mapped NumPy arrays.
+
+    Vectors are stored L2-normalised in a float32 matrix so cosine similarity
+    is a single matrix-vector product. Alongside the matrix live the email ids,
+    the email dates (for `/on` filtering) and, once built, an IVF coarse
+    quantiser used for approximate search on large mailboxes.
+
+    Args:
+        path (str): Directory holding the index files.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        self.meta = {"dim": 0, "count": 0, "capacity": 0, "watermark": 0, "nlist": 0}
+        meta_path = os.path.join(path, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                self.meta.update(json.load(f))
+        self.vectors = self.ids = self.days = self.lists = self.centroids = None
+        if self.meta["capacity"]:
+            self._open()
+
+    @property
+    def count(self) -> int:
+        return self.meta["count"]
+
+    @property
+    def watermark(self) -> int:
+        return self.meta["watermark"]
+
+    def contains(self, ids: List[int]) -> set[int]:
+        """
+        Return the subset of `ids` already stored.
+        """
+        with self._lock:
+            n = self.count
+            if n == 0 or not ids:
+                return set()
+            ids = np.asarray(ids, dtype=np.int64)
+            return set(ids[np.isin(ids, self.ids[:n])].tolist())
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _open(self) -> None:
+        capacity, dim = self.meta["capacity"], self.meta["dim"]
+        self.vectors = np.memmap(self._file("vectors.f32"), dtype=np.float32, mode="r+", shape=(capacity, dim))
+        self.ids = np.memmap(self._file("ids.i64"), dtype=np.int64, mode="r+", shape=(capacity,))
+        self.days = np.memmap(self._file("days.i32"), dtype=np.int32, mode="r+", shape=(capacity,))
+        self.lists = np.memmap(self._file("lists.i32"), dtype=np.int32, mode="r+", shape=(capacity,))
+        if self.meta["nlist"]:
+            self.centroids = np.fromfile(self._file("centroids.f32"), dtype=np.float32).reshape(self.meta["nlist"], dim)
+
+    def _save_meta(self) -> None:
+        tmp = self._file("meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp, self._file("meta.json"))
+
+    def _grow(self, needed: int, dim: int) -> None:
+        capacity = max(self.meta["capacity"], _INITIAL_CAPACITY)
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self.meta["capacity"]:
+            return
+        for name, itemsize in (("vectors.f32", 4 * dim), ("ids.i64", 8), ("days.i32", 4), ("lists.i32", 4)):
+            with open(self._file(name), "ab") as f:
+                f.truncate(capacity * itemsize)
+        self.vectors = self.ids = self.days = self.lists = None
+        self.meta["capacity"], self.meta["dim"] = capacity, dim
+        self._open()
+
+    def add(self, ids: List[int], vectors: np.ndarray, dates: List) -> None:
+        """
+        Append vectors for new emails and advance the watermark.
+
+        Args:
+            ids (List[int]): The email ids.
+            vectors (np.ndarray): The (n, dim) embeddings of the emails.
+            dates (List): The email datetimes.
+        """
+        if not ids:
+            return
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+        with self._lock:
+            if self.meta["dim"] and vectors.shape[1] != self.meta["dim"]:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match index dimension {self.meta['dim']}.")
+            start = self.count
+            end = start + len(ids)
+            self._grow(end, vectors.shape[1])
+            self.vectors[start:end] = vectors
+            self.ids[start:end] = ids
+            self.days[start:end] = [_to_day(d) for d in dates]
+            self.lists[start:end] = self._assign(vectors) if self.centroids is not None else -1
+            for array in (self.vectors, self.ids, self.days, self.lists):
+                array.flush()
+            self.meta["count"] = end
+            self.meta["watermark"] = max(self.meta["watermark"], int(max(ids)))
+            self._save_meta()
+
+    def drop_before(self, day: str) -> int:
+        """
+        Remove the vectors of emails sent before `day`, compacting the arrays in place.
+        The watermark is kept so dropped emails are not synced again.
+
+        Args:
+            day (str): The first day (yyyy-mm-dd) to keep.
+
+        Returns:
+            int: The number of vectors removed.
+        """
+        with self._lock:
+            n = self.count
+            if n == 0:
+                return 0
+            days = self.days[:n]
+            keep = np.flatnonzero((days >= _to_day(day)) | (days < 0))
+            kept = len(keep)
+            if kept == n:
+                return 0
+            for array in (self.vectors, self.ids, self.days, self.lists):
+                array[:kept] = np.asarray(array[keep])
+                array.flush()
+            self.meta["count"] = kept
+            self._save_meta()
+        logger.info(f"Dropped {n - kept} vectors of mail before {day} from the local index.")
+        return n - kept
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    def build_ivf(self, nlist: int | None = None, iterations: int = 10, sample_size: int = 50_000) -> None:
+        """
+        Build the approximate (IVF) index with spherical k-means over a sample of the vectors.
+
+        Args:
+            nlist (int | None): The number of clusters, defaults to ~sqrt(count).
+            iterations (int): The number of k-means iterations.
+            sample_size (int): The number of vectors used to train the centroids.
+        """
+        with self._lock:
+            n = self.count
+            if n == 0:
+                return
+            nlist = nlist or max(1, int(np.sqrt(n)))
+            rng = np.random.default_rng(0)
+            sample = np.asarray(self.vectors[rng.choice(n, size=min(n, sample_size), replace=False)])
+            centroids = sample[rng.choice(len(sample), size=min(nlist, len(sample)), replace=False)]
+            for _ in range(iterations):
+                assignment = np.argmax(sample @ centroids.T, axis=1)
+                for c in range(len(centroids)):
+                    members = sample[assignment == c]
+                    if len(members):
+                        centroids[c] = members.sum(axis=0)
+                centroids = _normalize(centroids)
+
+            self.centroids = centroids.astype(np.float32)
+            self.centroids.tofile(self._file("centroids.f32"))
+            for start in range(0, n, 65_536):
+                end = min(n, start + 65_536)
+                self.lists[start:end] = self._assign(np.asarray(self.vectors[start:end]))
+            self.lists.flush()
+            self.meta["nlist"] = len(self.centroids)
+            self._save_meta()
+        logger.info(f"Built IVF index with {len(self.centroids)} lists over {n} vectors.")
+
+    def search(self, query_vector: np.ndarray, k: int, day: int | None = None, nprobe: int = 8, since: int | None = None) -> List[tuple[int, float]]:
+        """
+        Top-k cosine search over the stored vectors.
+
+        Args:
+            query_vector (np.ndarray): The query embedding.
+            k (int): The number of results.
+            day (int | None): Optional day (days since epoch) to restrict results to.
+            nprobe (int): The number of IVF lists probed in approximate mode.
+            since (int | None): Optional first day (days since epoch) to return, emails of unknown date are kept.
+
+        Returns:
+            List[tuple[int, float]]: (email id, similarity) pairs, best first.
+        """
+        query_vector = _normalize(np.asarray(query_vector, dtype=np.float32).reshape(-1))
+        with self._lock:
+            n = self.count
+            if n == 0 or k <= 0:
+                return []
+            vectors, ids = self.vectors[:n], self.ids[:n]
+            mask = None
+            if day is not None:
+                mask = self.days[:n] == day
+            if since is not None:
+                days = self.days[:n]
+                since_mask = (days >= since) | (days < 0)
+                mask = since_mask if mask is None else mask & since_mask
+            if self.centroids is not None and n >= APPROX_MIN_ROWS:
+                probes = np.argsort(self.centroids @ query_vector)[::-1][:nprobe]
+                probe_mask = np.isin(self.lists[:n], probes)
+                mask = probe_mask if mask is None else mask & probe_mask
+
+            if mask is not None:
+                rows = np.flatnonzero(mask)
+                scores = np.asarray(vectors[rows]) @ query_vector
+            else:
+                rows = None
+                scores = np.asarray(vectors) @ query_vector
+
+            if len(scores) == 0:
+                return []
+            k = min(k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            positions = rows[top] if rows is not None else top
+            return [(int(ids[p]), float(scores[t])) for p, t in zip(positions, top)]
+
+
+def get_local_index_path(email: str) -> str:
+    """
+    Generate the local index directory based on the email address.
+    """
+    return os.path.join(GREPMAIL_DATA_DIR, f'vector_index_{email.split("@")[0]}')
+
+
+def search_local_index(index: LocalVectorIndex, query: str, limit: int, dt_filter: str | None = None, since: str | None = None) -> List[int]:
+    """
+    Semantic search on the local index with a locally computed query embedding.
+
+    Args:
+        index (LocalVectorIndex): The local vector index.
+        query (str): The natural language query.
+        limit (int): The maximum number of emails to return.
+        dt_filter (str | None): Optional date (yyyy-mm-dd) to filter on.
+        since (str | None): Optional first day (yyyy-mm-dd) to return, e.g. the retention cutoff.
+
+    Returns:
+        List[int]: The matching email ids, best match first.
+    """
+    query_vector = embed_texts([query])[0]
+    day = _to_day(dt_filter) if dt_filter else None
+    since = _to_day(since) if since else None
+    return [email_id for email_id, _ in index.search(query_vector, limit, day, since=since)]
@@ -0,0 +1,44 @@
+import os
+import threading
+import time
+from typing import Callable, List, Tuple
+
+from grepmail.logger import logger
+
+# The gist ping costs a Gemini request, so it is opt-in.
+WARMUP_GIST = os.getenv("GREPMAIL_WARMUP_GIST", "false").lower() in ("1", "true", "yes")
+
+
+class Warmup:
+    """
+    Runs warm-up steps in a background thread so the first real query doesn't
+    pay for model loading and connection setup, and records their status and timings.
+
+    Args:
+        steps (List[Tuple[str, Callable]]): (name, callable) pairs, run in order.
+    """
+
+    def __init__(self, steps: List[Tuple[str, Callable[[], object]]]):
+        self.steps = steps
+        self.status = {name: {"status": "pending", "ms": None, "error": None} for name, _ in steps}
+        self.done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="grepmail-warmup", daemon=True)
+
+    def start(self) -> "Warmup":
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        for name, step in self.steps:
+            self.status[name]["status"] = "running"
+            start = time.perf_counter()
+            try:
+                step()
+                self.status[name]["status"] = "done"
+            except Exception as e:
+                self.status[name]["status"] = "failed"
+                self.status[name]["error"] = str(e)
+                logger.error(f"Warm-up step '{name}' failed: {e}")
+            self.status[name]["ms"] = (time.perf_counter() - start) * 1000
+            logger.info(f"Warm-up step '{name}' {self.status[name]['status']} in {self.status[name]['ms']:.0f} ms.")
+        self.done.set()